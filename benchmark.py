@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Compare single-process and chunked encoding of a long render."""
+import argparse
+import os
+import subprocess
+import time
+from pathlib import Path
+
+from src.core.composer import Clip, Composition, Subtitles, VideoComposer
+from src.core.config import settings
+
+
+def make_source(path: Path, duration: int) -> None:
+    """Synthetic test clip with a tone, in the shape of a generated segment."""
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size=720x1280:rate=24:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", "48",
+        "-c:a", "aac", "-shortest",
+        str(path)
+    ], check=True)
+
+
+def make_subtitles(path: Path, duration: int) -> None:
+    """One subtitle line every five seconds."""
+    lines = []
+    for i, start in enumerate(range(0, duration, 5), 1):
+        end = min(start + 5, duration)
+        lines.append(f"{i}\n00:{start // 60:02d}:{start % 60:02d},000 --> 00:{end // 60:02d}:{end % 60:02d},000\nLine {i}\n")
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=int, default=60, help="Length of the test clip in seconds")
+    args = parser.parse_args()
+    
+    settings.temp_dir.mkdir(parents=True, exist_ok=True)
+    source = settings.temp_dir / "benchmark_source.mp4"
+    subtitles = settings.temp_dir / "benchmark.srt"
+    make_source(source, args.duration)
+    make_subtitles(subtitles, args.duration)
+    
+    composer = VideoComposer()
+    composition = Composition(
+        [Clip(source)],
+        clip_audio=True,
+        subtitles=Subtitles(subtitles),
+        size=(settings.video_width, settings.video_height)
+    )
+    
+    print("=" * 70)
+    print(f"Encoding a {args.duration}s clip on {os.cpu_count()} cores")
+    print("=" * 70)
+    
+    timings = {}
+    for chunked in (False, True):
+        output = settings.temp_dir / f"benchmark_{'chunked' if chunked else 'single'}.mp4"
+        start = time.monotonic()
+        result = composer.render(composition, output, chunked=chunked)
+        timings[chunked] = time.monotonic() - start
+        print(f"{'chunked' if chunked else 'single ':8} {timings[chunked]:7.1f}s  {'ok' if result else 'FAILED'}")
+        output.unlink(missing_ok=True)
+    
+    print(f"\nSpeedup: {timings[False] / timings[True]:.2f}x")
+    
+    source.unlink(missing_ok=True)
+    subtitles.unlink(missing_ok=True)
@@ -0,0 +1,236 @@
+"""Admission control for upstream generation requests."""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from src.core.config import settings
+from src.api.jobs import job_executor, job_manager
+
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class QueueFullError(Exception):
+    """Raised when the admission queue cannot take more work."""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+    
+    def __init__(self, rate_per_minute: float, capacity: int):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+    
+    def try_take(self, cost: int = 1) -> bool:
+        """Take tokens if available."""
+        self._refill()
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+    
+    def time_until(self, cost: int = 1) -> float:
+        """Seconds until cost tokens are available."""
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.rate)
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass(order=True)
+class QueuedTask:
+    """A task waiting for upstream capacity."""
+    priority: int
+    seq: int
+    model: str = field(compare=False)
+    cost: int = field(compare=False)
+    fn: Callable = field(compare=False)
+    args: tuple = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class AdmissionController:
+    """
+    Bounded priority queue in front of the generation tasks.
+    
+    Tasks are started in priority order as soon as the token bucket of
+    their upstream model allows; once the queue is full new requests are
+    rejected with a Retry-After estimate.
+    """
+    
+    def __init__(self, max_queue: Optional[int] = None):
+        self.max_queue = max_queue or settings.admission_queue_size
+        self._queue: list[QueuedTask] = []
+        self._buckets: dict[str, TokenBucket] = {}
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        self.admitted = 0
+        self.rejected = 0
+        self.cancelled = 0
+    
+    def ensure_capacity(self) -> None:
+        """Raise QueueFullError if a new task would not fit in the queue."""
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+    
+    def submit(
+        self,
+        model: str,
+        fn: Callable,
+        *args: Any,
+        priority: str = "interactive",
+        cost: int = 1
+    ) -> None:
+        """
+        Queue a task until its model has capacity.
+        
+        Args:
+            model: Upstream model the task will call
+            fn: Task function (sync or async), run on the "io" pool
+            args: Task arguments
+            priority: "interactive" or "batch"
+            cost: Number of upstream requests the task will make
+        """
+        self.ensure_capacity()
+        self._ensure_running(asyncio.get_running_loop())
+        
+        bucket = self._bucket(model)
+        heapq.heappush(self._queue, QueuedTask(
+            priority=PRIORITIES[priority],
+            seq=next(self._seq),
+            model=model,
+            cost=min(cost, bucket.capacity),
+            fn=fn,
+            args=args,
+            enqueued_at=time.monotonic()
+        ))
+        self._wakeup.set()
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drop the queued task of a job before it was started.
+        
+        Returns:
+            True if a queued task was removed
+        """
+        remaining = [task for task in self._queue if not (task.args and task.args[0] == job_id)]
+        if len(remaining) == len(self._queue):
+            return False
+        
+        self._queue = remaining
+        heapq.heapify(self._queue)
+        self.cancelled += 1
+        return True
+    
+    def depth(self) -> int:
+        """Number of queued tasks."""
+        return len(self._queue)
+    
+    def estimated_wait(self) -> float:
+        """Seconds until the last queued task would be started."""
+        queued_cost: dict[str, int] = {}
+        for task in self._queue:
+            queued_cost[task.model] = queued_cost.get(task.model, 0) + task.cost
+        
+        return max(
+            (self._bucket(model).time_until(cost) for model, cost in queued_cost.items()),
+            default=0.0
+        )
+    
+    def retry_after(self) -> int:
+        """Retry-After value for rejected requests."""
+        return max(1, math.ceil(self.estimated_wait()))
+    
+    def stats(self) -> dict[str, Any]:
+        """Queue statistics."""
+        return {
+            "queue_depth": self.depth(),
+            "max_queue": self.max_queue,
+            "estimated_wait_seconds": round(self.estimated_wait(), 1),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "tokens": {model: round(bucket.tokens, 2) for model, bucket in self._buckets.items()},
+        }
+    
+    def _bucket(self, model: str) -> TokenBucket:
+        """Token bucket for an upstream model."""
+        if model not in self._buckets:
+            if model == settings.veo_model:
+                rate = settings.veo_requests_per_minute
+            else:
+                rate = settings.imagen_requests_per_minute
+            self._buckets[model] = TokenBucket(rate, settings.admission_burst)
+        return self._buckets[model]
+    
+    def _ensure_running(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start the dispatcher on the current event loop if needed."""
+        if self._task and not self._task.done() and self._loop is loop:
+            return
+        
+        if self._loop is not loop:
+            # Tasks queued on another event loop cannot be started from this one
+            self._queue = []
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._dispatch())
+    
+    async def _dispatch(self) -> None:
+        """Start admissible tasks, then sleep until a bucket refills."""
+        while True:
+            self._wakeup.clear()
+            
+            # Walk tasks in priority order; a model whose bucket is empty
+            # blocks its later tasks so ordering is kept per model.
+            blocked: dict[str, float] = {}
+            remaining = []
+            for task in sorted(self._queue):
+                if task.model in blocked:
+                    remaining.append(task)
+                elif self._bucket(task.model).try_take(task.cost):
+                    self._launch(task)
+                else:
+                    blocked[task.model] = self._bucket(task.model).time_until(task.cost)
+                    remaining.append(task)
+            
+            self._queue = remaining
+            heapq.heapify(self._queue)
+            
+            delay = min(blocked.values()) if blocked else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _launch(self, task: QueuedTask) -> None:
+        """Hand an admitted task to the I/O worker pool; failing that, fail its job."""
+        try:
+            job_executor.submit("io", task.fn, *task.args)
+        except Exception as e:
+            # Keep the dispatcher alive for the other queued tasks
+            print(f"Failed to start queued task: {e}")
+            if task.args:
+                job_manager.fail(task.args[0], f"Failed to start: {e}")
+            return
+        self.admitted += 1
+
+
+# Global admission controller instance
+admission_controller = AdmissionController()
@@ -1,9 +1,37 @@
 """FastAPI application setup."""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.core.config import settings
-from src.api.routes import health_router, character_router, video_router, voiceover_router
+from src.api.routes import (
+    health_router,
+    character_router,
+    video_router,
+    voiceover_router,
+    jobs_router,
+    pipeline_router,
+)
+from src.api.jobs import job_manager
+from src.api.retention import retention_manager
+from src.api.routes.video import resume_interrupted_jobs
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks."""
+    if settings.execution_mode == "queue":
+        # Workers share job state with the API and pick up interrupted tasks themselves
+        if settings.job_store != "sqlite":
+            raise RuntimeError("EXECUTION_MODE=queue requires JOB_STORE=sqlite")
+    else:
+        resumed = resume_interrupted_jobs()
+        if resumed:
+            print(f"Resumed {resumed} interrupted video job(s)")
+    retention_manager.start()
+    yield
+    await retention_manager.stop()
+    job_manager.flush()
 
 
 def create_app() -> FastAPI:
@@ -11,7 +39,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="AI Influencer Video Generator API",
         description="Generate professional influencer videos using Veo3 and Imagen 4.0",
-        version="2.0.0"
+        version="2.0.0",
+        lifespan=lifespan
     )
     
     # CORS middleware
@@ -28,6 +57,8 @@ def create_app() -> FastAPI:
     app.include_router(character_router)
     app.include_router(video_router)
     app.include_router(voiceover_router)
+    app.include_router(jobs_router)
+    app.include_router(pipeline_router)
     
     return app
 
@@ -0,0 +1,300 @@
+"""Content-addressed cache of generation results."""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.core.config import settings
+from src.api.jobs import job_manager
+from src.api.job_store import TERMINAL_STATUSES
+
+
+@dataclass
+class CacheEntry:
+    """A finished generation that can be served again."""
+    job_id: str
+    result_url: str
+    paths: list[str]
+    size: int
+    created_at: float
+    result_urls: Optional[dict[str, str]] = None
+    job_type: str = ""
+
+
+class GenerationCache:
+    """
+    Maps normalized generation inputs to finished jobs.
+    
+    Identical requests are answered with the existing job, requests that
+    match a job still running are attached to it (single-flight) and
+    Idempotency-Key replays return the job created by the first request.
+    
+    The API process owns the index. In queue mode jobs finish in worker
+    processes, so the API settles in-flight keys itself once their job is
+    terminal, and workers do not persist their copy (persist=False).
+    """
+    
+    def __init__(
+        self,
+        index_path: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None
+    ):
+        self.index_path = index_path or settings.data_dir / "cache" / "generation_index.json"
+        self.max_bytes = max_bytes or settings.cache_max_bytes
+        self.max_age = max_age or settings.cache_max_age
+        
+        # Queue workers set this to False; only the API writes the index
+        self.persist = True
+        
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._in_flight: dict[str, str] = {}
+        self._idempotency: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.replays = 0
+        self.evictions = 0
+        
+        self._load()
+    
+    @staticmethod
+    def make_key(kind: str, **inputs: Any) -> str:
+        """Hash normalized generation inputs into a cache key."""
+        normalized = {"kind": kind}
+        for name, value in inputs.items():
+            if isinstance(value, bytes):
+                value = hashlib.sha256(value).hexdigest()
+            elif isinstance(value, str):
+                value = " ".join(value.split())
+            normalized[name] = value
+        
+        payload = json.dumps(normalized, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def resolve(self, key: str, idempotency_key: Optional[str] = None) -> Optional[str]:
+        """
+        Find an existing job for a request.
+        
+        Args:
+            key: Cache key from make_key
+            idempotency_key: Client supplied Idempotency-Key header
+        
+        Returns:
+            ID of a finished or in-flight job to return instead, or None
+        """
+        with self._lock:
+            if idempotency_key:
+                job_id = self._idempotent_job(idempotency_key)
+                if job_id:
+                    self.replays += 1
+                    return job_id
+            
+            job_id = self._in_flight.get(key)
+            if job_id:
+                job = job_manager.get(job_id)
+                if job and job.status not in TERMINAL_STATUSES:
+                    self.coalesced += 1
+                    return self._remember(idempotency_key, job_id)
+                
+                # Finished, possibly in a worker process that could not tell us
+                del self._in_flight[key]
+                if job and job.status == "completed" and job.result_url:
+                    self._store(key, job.job_id, job.result_url, self._paths(job), job.result_urls)
+                    self._evict()
+                self._save()
+            
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._ensure_job(entry)
+                return self._remember(idempotency_key, entry.job_id)
+            
+            if entry:
+                self._drop(key)
+                self._save()
+            
+            self.misses += 1
+            return None
+    
+    def begin(self, key: str, job_id: str, idempotency_key: Optional[str] = None) -> None:
+        """Register a newly launched job as in flight for its key."""
+        with self._lock:
+            self._in_flight[key] = job_id
+            self._remember(idempotency_key, job_id)
+            self._save()
+    
+    def finish(
+        self,
+        key: str,
+        job_id: str,
+        result_url: str,
+        paths: list[Path],
+        result_urls: Optional[dict[str, str]] = None
+    ) -> None:
+        """Store the outputs of a completed job."""
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._store(key, job_id, result_url, paths, result_urls)
+            self._evict()
+            self._save()
+    
+    def abandon(self, key: str) -> None:
+        """Forget an in-flight job that failed."""
+        with self._lock:
+            self._in_flight.pop(key, None)
+    
+    def abandon_job(self, job_id: str) -> None:
+        """Forget a cancelled job, so identical requests start a new one."""
+        with self._lock:
+            for key in [k for k, in_flight in self._in_flight.items() if in_flight == job_id]:
+                del self._in_flight[key]
+            for key in [k for k, (remembered, _) in self._idempotency.items() if remembered == job_id]:
+                del self._idempotency[key]
+            self._save()
+    
+    def stats(self) -> dict[str, Any]:
+        """Cache counters and usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(entry.size for entry in self._entries.values()),
+                "in_flight": len(self._in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "coalesced": self.coalesced,
+                "idempotent_replays": self.replays,
+                "evictions": self.evictions,
+            }
+    
+    def _idempotent_job(self, idempotency_key: str) -> Optional[str]:
+        """Job created by an earlier request with the same Idempotency-Key."""
+        remembered = self._idempotency.get(idempotency_key)
+        if not remembered:
+            return None
+        
+        job_id, created_at = remembered
+        if time.time() - created_at > settings.idempotency_ttl or not job_manager.get(job_id):
+            del self._idempotency[idempotency_key]
+            return None
+        return job_id
+    
+    def _remember(self, idempotency_key: Optional[str], job_id: str) -> str:
+        """Bind an Idempotency-Key to a job."""
+        if idempotency_key:
+            self._idempotency[idempotency_key] = (job_id, time.time())
+        return job_id
+    
+    def _store(
+        self,
+        key: str,
+        job_id: str,
+        result_url: str,
+        paths: list[Path],
+        result_urls: Optional[dict[str, str]] = None
+    ) -> None:
+        """Add an index entry for a completed job."""
+        job = job_manager.get(job_id)
+        self._entries[key] = CacheEntry(
+            job_id=job_id,
+            job_type=job.job_type if job else "",
+            result_url=result_url,
+            result_urls=result_urls,
+            paths=[str(path) for path in paths],
+            size=sum(path.stat().st_size for path in paths if path.exists()),
+            created_at=time.time()
+        )
+    
+    @staticmethod
+    def _paths(job: Any) -> list[Path]:
+        """Output files behind the download URLs of a completed job."""
+        urls = [job.result_url, *(job.result_urls or {}).values()]
+        return [
+            settings.output_dir / url.rsplit("/", 1)[1]
+            for url in dict.fromkeys(urls)
+            if url.startswith("/api/v1/download/")
+        ]
+    
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        """Check an entry is within max_age and its files still exist."""
+        if time.time() - entry.created_at > self.max_age:
+            return False
+        return all(Path(path).exists() for path in entry.paths)
+    
+    def _ensure_job(self, entry: CacheEntry) -> None:
+        """Recreate the completed job if it is no longer known (e.g. after restart)."""
+        if job_manager.get(entry.job_id):
+            return
+        
+        job_manager.create(entry.job_id, entry.job_type)
+        job_manager.complete(
+            entry.job_id,
+            entry.result_url,
+            "Served from cache",
+            result_urls=entry.result_urls
+        )
+    
+    def _evict(self) -> None:
+        """Drop stale entries, then least recently used ones over the size budget."""
+        for key in [k for k, entry in self._entries.items() if not self._is_fresh(entry)]:
+            self._drop(key)
+        
+        total = sum(entry.size for entry in self._entries.values())
+        while self._entries and total > self.max_bytes:
+            key = next(iter(self._entries))
+            total -= self._entries[key].size
+            self._drop(key)
+        
+        cutoff = time.time() - settings.idempotency_ttl
+        for idempotency_key in [k for k, (_, created) in self._idempotency.items() if created < cutoff]:
+            del self._idempotency[idempotency_key]
+    
+    def _drop(self, key: str) -> None:
+        """Remove an entry from the index."""
+        del self._entries[key]
+        self.evictions += 1
+    
+    def _load(self) -> None:
+        """Load the persisted index."""
+        if not self.index_path.exists():
+            return
+        
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            for key, entry in data.get("entries", {}).items():
+                self._entries[key] = CacheEntry(**entry)
+            for idempotency_key, (job_id, created_at) in data.get("idempotency", {}).items():
+                self._idempotency[idempotency_key] = (job_id, created_at)
+        except Exception as e:
+            print(f"Ignoring unreadable cache index: {e}")
+    
+    def _save(self) -> None:
+        """Persist the index atomically."""
+        if not self.persist:
+            return
+        data = {
+            "entries": {key: asdict(entry) for key, entry in self._entries.items()},
+            "idempotency": self._idempotency,
+        }
+        
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            temp_path.replace(self.index_path)
+        except Exception as e:
+            print(f"Failed to save cache index: {e}")
+
+
+# Global generation cache instance
+generation_cache = GenerationCache()
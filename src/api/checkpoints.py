@@ -0,0 +1,112 @@
+"""Durable checkpoints for jobs that own upstream Veo operations."""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from src.core.config import settings
+
+
+class CheckpointStore:
+    """
+    Persists what is needed to re-attach to a job after a restart.
+    
+    One JSON file per job holds the task kind, its parameters, the
+    operations it started (name plus the fingerprint of the key that
+    created them) and the stage it reached. Files are removed once the
+    job completes or fails.
+    """
+    
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = directory or settings.data_dir / "checkpoints"
+        self._lock = threading.Lock()
+    
+    def start(self, job_id: str, kind: str, params: dict[str, Any]) -> dict[str, Any]:
+        """Create the checkpoint for a job, or return the one left by a previous run."""
+        with self._lock:
+            checkpoint = self._read(job_id)
+            if checkpoint is None:
+                checkpoint = {
+                    "job_id": job_id,
+                    "kind": kind,
+                    "params": params,
+                    "stage": "started",
+                    "operations": {},
+                    "completed_segments": [],
+                }
+                self._write(checkpoint)
+            return checkpoint
+    
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        """Load a job checkpoint."""
+        with self._lock:
+            return self._read(job_id)
+    
+    def record_operation(self, job_id: str, segment: str, operation_name: str, key_id: str) -> None:
+        """Remember an operation as soon as Veo has accepted it."""
+        with self._lock:
+            checkpoint = self._read(job_id)
+            if checkpoint is None:
+                return
+            checkpoint["operations"][segment] = {"name": operation_name, "key_id": key_id}
+            checkpoint["stage"] = "generating"
+            self._write(checkpoint)
+    
+    def complete_segment(self, job_id: str, segment: str) -> None:
+        """Mark a segment as downloaded."""
+        with self._lock:
+            checkpoint = self._read(job_id)
+            if checkpoint is None or segment in checkpoint["completed_segments"]:
+                return
+            checkpoint["completed_segments"].append(segment)
+            self._write(checkpoint)
+    
+    def set_stage(self, job_id: str, stage: str) -> None:
+        """Record the stage a job has reached."""
+        with self._lock:
+            checkpoint = self._read(job_id)
+            if checkpoint is None:
+                return
+            checkpoint["stage"] = stage
+            self._write(checkpoint)
+    
+    def remove(self, job_id: str) -> None:
+        """Drop the checkpoint of a finished job."""
+        with self._lock:
+            self._path(job_id).unlink(missing_ok=True)
+    
+    def pending(self) -> list[dict[str, Any]]:
+        """All checkpoints left behind by unfinished jobs."""
+        if not self.directory.exists():
+            return []
+        
+        checkpoints = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                checkpoints.append(json.loads(path.read_text(encoding="utf-8")))
+            except Exception as e:
+                print(f"Ignoring unreadable checkpoint {path.name}: {e}")
+        return checkpoints
+    
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+    
+    def _read(self, job_id: str) -> Optional[dict[str, Any]]:
+        path = self._path(job_id)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    
+    def _write(self, checkpoint: dict[str, Any]) -> None:
+        """Write atomically so a crash never leaves a truncated file."""
+        checkpoint["updated_at"] = time.time()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(checkpoint["job_id"])
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+        temp_path.replace(path)
+
+
+# Global checkpoint store instance
+checkpoint_store = CheckpointStore()
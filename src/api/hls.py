@@ -0,0 +1,87 @@
+"""HLS packaging of finished videos for streaming preview."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from src.core.composer import VideoComposer
+from src.core.config import settings
+from src.api.jobs import job_manager
+from src.api.retention import retention_manager
+
+
+class HLSPackager:
+    """
+    Packages finished videos as HLS playlists and segments in output_dir.
+    
+    Packaging is scheduled once a job has completed and runs on its own
+    background threads, so it never delays the result. When it finishes,
+    the playlist URL is added to the job's result_urls as "hls".
+    """
+    
+    def __init__(self, output_dir: Optional[Path] = None, max_workers: Optional[int] = None):
+        self.output_dir = output_dir or settings.output_dir
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.hls_workers,
+            thread_name_prefix="hls"
+        )
+        self._lock = threading.Lock()
+        
+        self.scheduled = 0
+        self.packaged = 0
+        self.failed = 0
+    
+    def playlist_path(self, job_id: str) -> Path:
+        """Where the playlist of a job is stored."""
+        return self.output_dir / f"{job_id}_hls.m3u8"
+    
+    def schedule(self, job_id: str, video_path: Path) -> None:
+        """Package a finished video in the background, if HLS is enabled."""
+        if not settings.hls_enabled:
+            return
+        
+        with self._lock:
+            self.scheduled += 1
+        self._executor.submit(self.package, job_id, video_path)
+    
+    def package(self, job_id: str, video_path: Path) -> Optional[Path]:
+        """
+        Package a video now and publish the playlist URL on its job.
+        
+        Returns:
+            Path to the playlist or None
+        """
+        playlist_path = self.playlist_path(job_id)
+        try:
+            result = VideoComposer().package_hls(video_path, playlist_path, settings.hls_segment_seconds)
+        except Exception as e:
+            print(f"HLS packaging of {job_id} failed: {e}")
+            result = None
+        
+        with self._lock:
+            if result:
+                self.packaged += 1
+            else:
+                self.failed += 1
+        if not result:
+            return None
+        
+        # Tracked as one artifact with the segments it lists
+        retention_manager.track(playlist_path)
+        
+        job_manager.merge_result_urls(job_id, {"hls": f"/api/v1/hls/{playlist_path.name}"})
+        return playlist_path
+    
+    def stats(self) -> dict[str, Any]:
+        """Packaging counters."""
+        with self._lock:
+            return {
+                "enabled": settings.hls_enabled,
+                "scheduled": self.scheduled,
+                "packaged": self.packaged,
+                "failed": self.failed,
+            }
+
+
+# Global HLS packager instance
+hls_packager = HLSPackager()
@@ -0,0 +1,323 @@
+"""Storage backends for job state."""
+import bisect
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from src.core.config import settings
+
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobStoreSchemaError(RuntimeError):
+    """Raised when the stored table does not match the columns the code writes."""
+
+
+class JobStore(ABC):
+    """Interface of job storage backends; jobs are plain dicts."""
+    
+    @abstractmethod
+    def save_many(self, jobs: Iterable[dict[str, Any]]) -> None:
+        """Insert or replace jobs."""
+    
+    @abstractmethod
+    def load(self, job_id: str) -> Optional[dict[str, Any]]:
+        """Load a job by ID."""
+    
+    @abstractmethod
+    def load_many(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        """Load the jobs that exist among several IDs."""
+    
+    @abstractmethod
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        cursor: Optional[tuple[float, str]] = None,
+        limit: int = 50
+    ) -> list[dict[str, Any]]:
+        """
+        List jobs, newest first.
+        
+        Args:
+            status: Only jobs with this status
+            job_type: Only jobs of this type
+            created_after: Only jobs created at or after this timestamp
+            created_before: Only jobs created before this timestamp
+            cursor: (created_at, job_id) of the last job of the previous page
+            limit: Maximum number of jobs
+        """
+    
+    @abstractmethod
+    def delete_finished(self, before: float) -> int:
+        """Delete finished jobs last updated before a timestamp."""
+    
+    def save(self, job: dict[str, Any]) -> None:
+        """Insert or replace one job."""
+        self.save_many([job])
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Process-local store (default, used by tests).
+    
+    Keeps (created_at, job_id) keys in a sorted list, so listings walk
+    newest first from the keyset cursor instead of sorting every job.
+    """
+    
+    def __init__(self):
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._by_created: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+    
+    def save_many(self, jobs: Iterable[dict[str, Any]]) -> None:
+        with self._lock:
+            for job in jobs:
+                previous = self._jobs.get(job["job_id"])
+                key = (job["created_at"], job["job_id"])
+                if previous is None or previous["created_at"] != job["created_at"]:
+                    if previous is not None:
+                        self._unindex(previous)
+                    bisect.insort(self._by_created, key)
+                self._jobs[job["job_id"]] = dict(job)
+    
+    def load(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def load_many(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(self._jobs[job_id]) for job_id in job_ids if job_id in self._jobs]
+    
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        cursor: Optional[tuple[float, str]] = None,
+        limit: int = 50
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            # Keys below both the cursor and created_before, newest first
+            end = len(self._by_created)
+            if cursor is not None:
+                end = bisect.bisect_left(self._by_created, tuple(cursor), 0, end)
+            if created_before is not None:
+                end = bisect.bisect_left(self._by_created, (created_before,), 0, end)
+            
+            jobs = []
+            for index in range(end - 1, -1, -1):
+                created_at, job_id = self._by_created[index]
+                if len(jobs) >= limit or (created_after is not None and created_at < created_after):
+                    break
+                job = self._jobs[job_id]
+                if (status is None or job["status"] == status) and (job_type is None or job["job_type"] == job_type):
+                    jobs.append(dict(job))
+            return jobs
+    
+    def delete_finished(self, before: float) -> int:
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in TERMINAL_STATUSES and job["updated_at"] < before
+            ]
+            for job_id in expired:
+                self._unindex(self._jobs.pop(job_id))
+            return len(expired)
+    
+    def _unindex(self, job: dict[str, Any]) -> None:
+        """Remove a job's key from the creation-time index."""
+        index = bisect.bisect_left(self._by_created, (job["created_at"], job["job_id"]))
+        if index < len(self._by_created) and self._by_created[index][1] == job["job_id"]:
+            del self._by_created[index]
+
+
+class SQLiteJobStore(JobStore):
+    """
+    SQLite store in WAL mode, shareable between worker processes.
+    
+    Jobs are indexed by status and creation time for listings, and by
+    status and update time for TTL eviction, so neither scans the table.
+    """
+    
+    COLUMNS = (
+        "job_id", "status", "progress", "message", "result_url", "result_urls",
+        "error", "airtable_record_id", "stages", "job_type", "version", "created_at", "updated_at",
+    )
+    
+    JSON_COLUMNS = ("result_urls", "stages")
+    
+    # Columns added after the table was first released, with their
+    # definitions; databases created by older versions get them through
+    # ALTER TABLE when the store opens
+    ADDED_COLUMNS = {
+        "version": "INTEGER NOT NULL DEFAULT 0",
+        "job_type": "TEXT NOT NULL DEFAULT ''",
+        "stages": "TEXT",
+    }
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or settings.job_store_path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    result_url TEXT,
+                    result_urls TEXT,
+                    error TEXT,
+                    airtable_record_id TEXT,
+                    stages TEXT,
+                    job_type TEXT NOT NULL DEFAULT '',
+                    version INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._migrate()
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_type_created ON jobs (job_type, created_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at, job_id)"
+            )
+    
+    def save_many(self, jobs: Iterable[dict[str, Any]]) -> None:
+        rows = [self._to_row(job) for job in jobs]
+        if not rows:
+            return
+        
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                    rows
+                )
+        except sqlite3.OperationalError as e:
+            if "column" in str(e):
+                raise JobStoreSchemaError(f"Job table does not match the code: {e}") from e
+            raise
+    
+    def load(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+    
+    def load_many(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        jobs = []
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(job_ids), 500):
+            batch = job_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE job_id IN ({placeholders})", batch
+                ).fetchall()
+            jobs.extend(self._from_row(row) for row in rows)
+        return jobs
+    
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        cursor: Optional[tuple[float, str]] = None,
+        limit: int = 50
+    ) -> list[dict[str, Any]]:
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if job_type is not None:
+            conditions.append("job_type = ?")
+            params.append(job_type)
+        if created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            conditions.append("created_at < ?")
+            params.append(created_before)
+        if cursor is not None:
+            # Keyset pagination: resume strictly after the last row of the previous page
+            conditions.append("(created_at < ? OR (created_at = ? AND job_id < ?))")
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC, job_id DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+    
+    def delete_finished(self, before: float) -> int:
+        placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*TERMINAL_STATUSES, before)
+            )
+            return cursor.rowcount
+    
+    def _migrate(self) -> None:
+        """Add the columns a database created by an older version lacks."""
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in self.ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+                existing.add(column)
+        
+        missing = [column for column in self.COLUMNS if column not in existing]
+        if missing:
+            raise JobStoreSchemaError(
+                f"Job table {self.path} lacks columns {', '.join(missing)} and has no migration for them"
+            )
+    
+    def _to_row(self, job: dict[str, Any]) -> tuple:
+        row = dict(job)
+        for column in self.JSON_COLUMNS:
+            row[column] = json.dumps(row[column]) if row.get(column) else None
+        return tuple(row.get(column) for column in self.COLUMNS)
+    
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> dict[str, Any]:
+        job = dict(row)
+        for column in SQLiteJobStore.JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+
+def create_job_store() -> JobStore:
+    """Build the store selected by settings.job_store."""
+    if settings.job_store == "sqlite":
+        return SQLiteJobStore()
+    if settings.job_store == "memory":
+        return InMemoryJobStore()
+    raise ValueError(f"Unknown job store: {settings.job_store}")
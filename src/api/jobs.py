@@ -1,6 +1,19 @@
 """Job management for background tasks."""
-from typing import Optional
-from dataclasses import dataclass, field
+import asyncio
+import contextvars
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+from dataclasses import asdict, dataclass, field, replace
+
+from src.core.config import settings
+from src.core.ffmpeg import current_job_id, ffmpeg_runner
+from src.api.job_store import JobStore, JobStoreSchemaError, TERMINAL_STATUSES, create_job_store
+from src.api.task_queue import task_queue
 
 
 @dataclass
@@ -13,23 +26,89 @@ class Job:
     result_urls: Optional[dict[str, str]] = None
     error: Optional[str] = None
     airtable_record_id: Optional[str] = None
+    stages: Optional[dict[str, dict[str, Any]]] = None  # Per-stage status of pipeline jobs
+    job_id: str = ""
+    job_type: str = ""
+    version: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
 
 
 class JobManager:
-    """Manages background job status."""
+    """
+    Manages background job status on top of a pluggable JobStore.
     
-    def __init__(self):
-        self._jobs: dict[str, Job] = {}
+    Unfinished jobs are also kept in memory. Status, result and error
+    changes are written through immediately, while progress-only updates
+    are buffered and written in batches every job_flush_interval seconds.
+    Finished jobs are evicted from the store after job_ttl. Cancelled jobs
+    ignore later updates from tasks that are still winding down.
+    
+    Every update bumps the job version and is pushed to subscribers
+    (SSE streams, long-polls) on their own event loops.
+    """
+    
+    EVICTION_INTERVAL = 60.0
+    
+    def __init__(self, store: Optional[JobStore] = None):
+        self.store = store or create_job_store()
+        self._active: dict[str, Job] = {}
+        self._dirty: set[str] = set()
+        self._subscribers: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.RLock()
+        self._last_flush = time.monotonic()
+        self._last_eviction = time.monotonic()
+        
+        self.writes = 0
+        self.buffered_updates = 0
+        self.evicted = 0
     
-    def create(self, job_id: str) -> Job:
+    def create(self, job_id: str, job_type: str = "") -> Job:
         """Create a new job."""
-        job = Job()
-        self._jobs[job_id] = job
+        job = Job(job_id=job_id, job_type=job_type)
+        with self._lock:
+            self._active[job_id] = job
+            self._write([job])
+            self._evict_expired()
         return job
     
     def get(self, job_id: str) -> Optional[Job]:
         """Get job by ID."""
-        return self._jobs.get(job_id)
+        with self._lock:
+            job = self._active.get(job_id)
+        if job:
+            return job
+        
+        data = self.store.load(job_id)
+        return Job(**data) if data else None
+    
+    def get_many(self, job_ids: list[str]) -> dict[str, Job]:
+        """Get several jobs by ID; unknown IDs are left out."""
+        with self._lock:
+            jobs = {job_id: self._active[job_id] for job_id in job_ids if job_id in self._active}
+        
+        missing = [job_id for job_id in dict.fromkeys(job_ids) if job_id not in jobs]
+        if missing:
+            for data in self.store.load_many(missing):
+                jobs[data["job_id"]] = Job(**data)
+        return jobs
+    
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        cursor: Optional[tuple[float, str]] = None,
+        limit: int = 50
+    ) -> list[Job]:
+        """List jobs newest first from the store index (see JobStore.list_jobs)."""
+        # Buffered progress must reach the store before it is queried
+        self.flush()
+        return [
+            Job(**data)
+            for data in self.store.list_jobs(status, job_type, created_after, created_before, cursor, limit)
+        ]
     
     def update(
         self,
@@ -42,22 +121,83 @@ class JobManager:
         error: Optional[str] = None
     ) -> Optional[Job]:
         """Update job status."""
-        job = self._jobs.get(job_id)
-        if not job:
-            return None
+        with self._lock:
+            job = self._load_active(job_id)
+            if not job or job.status == "cancelled":
+                return job
+            
+            if status is not None:
+                job.status = status
+            if progress is not None:
+                job.progress = progress
+            if message is not None:
+                job.message = message
+            if result_url is not None:
+                job.result_url = result_url
+            if result_urls is not None:
+                job.result_urls = result_urls
+            if error is not None:
+                job.error = error
+            
+            self._commit(job, write_through=any(
+                value is not None for value in (status, result_url, result_urls, error)
+            ))
+        
+        return job
+    
+    def merge_result_urls(self, job_id: str, urls: dict[str, str]) -> Optional[Job]:
+        """
+        Add URLs to the result_urls of a completed job.
+        
+        The merge runs under the lock, so URLs published concurrently
+        (previews, HLS) never overwrite each other.
+        """
+        with self._lock:
+            job = self.get(job_id)
+            if not urls or not job or job.status != "completed":
+                return job
+            return self.update(job_id, result_urls={**(job.result_urls or {}), **urls})
+    
+    def update_stage(
+        self,
+        job_id: str,
+        stage: str,
+        status: Optional[str] = None,
+        progress: Optional[int] = None,
+        message: Optional[str] = None,
+        job_progress: Optional[int] = None
+    ) -> Optional[Job]:
+        """
+        Update one stage of a multi-stage job.
         
-        if status is not None:
-            job.status = status
-        if progress is not None:
-            job.progress = progress
-        if message is not None:
-            job.message = message
-        if result_url is not None:
-            job.result_url = result_url
-        if result_urls is not None:
-            job.result_urls = result_urls
-        if error is not None:
-            job.error = error
+        Args:
+            job_id: Job ID
+            stage: Stage name
+            status: Stage status (pending, processing, completed, failed, cancelled)
+            progress: Stage progress (0-100)
+            message: Stage message
+            job_progress: Overall job progress derived by the caller
+        """
+        with self._lock:
+            job = self._load_active(job_id)
+            if not job or job.status == "cancelled":
+                return job
+            
+            stages = dict(job.stages or {})
+            state = dict(stages.get(stage, {"status": "pending", "progress": 0, "message": None}))
+            if status is not None:
+                state["status"] = status
+            if progress is not None:
+                state["progress"] = progress
+            if message is not None:
+                state["message"] = message
+            stages[stage] = state
+            job.stages = stages
+            
+            if job_progress is not None:
+                job.progress = job_progress
+            
+            self._commit(job, write_through=status is not None)
         
         return job
     
@@ -86,7 +226,351 @@ class JobManager:
             message=f"Failed: {error}",
             error=error
         )
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Mark job as cancelled; it is not counted as a failure."""
+        return self.update(
+            job_id,
+            status="cancelled",
+            message="Cancelled"
+        )
+    
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Receive a snapshot of the job on the current event loop after every update."""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+    
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        """Stop receiving updates for a job."""
+        with self._lock:
+            subscribers = [sub for sub in self._subscribers.get(job_id, []) if sub[1] is not queue]
+            if subscribers:
+                self._subscribers[job_id] = subscribers
+            else:
+                self._subscribers.pop(job_id, None)
+    
+    async def wait_for_change(
+        self,
+        job_id: str,
+        version: Optional[int] = None,
+        timeout: float = 30.0
+    ) -> Optional[Job]:
+        """
+        Wait until a job moves past a version.
+        
+        Args:
+            job_id: Job ID
+            version: Version the caller already has (default: the current one)
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            The job as soon as it changed, or its current state on timeout;
+            finished jobs never change, so they are returned right away
+        """
+        queue = self.subscribe(job_id)
+        try:
+            job = self.get(job_id)
+            if job is None or job.status in TERMINAL_STATUSES or (version is not None and job.version != version):
+                return job
+            
+            return await self.next_change(job_id, queue, job.version, timeout) or self.get(job_id)
+        finally:
+            self.unsubscribe(job_id, queue)
+    
+    async def next_change(
+        self,
+        job_id: str,
+        queue: asyncio.Queue,
+        version: int,
+        timeout: float
+    ) -> Optional[Job]:
+        """
+        Wait on a subscription until the job moves past a version.
+        
+        Jobs run by worker processes only change in the store, so in "queue"
+        execution mode the store is also re-read every worker_poll_interval.
+        
+        Returns:
+            The updated job, or None on timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        polling = settings.execution_mode == "queue"
+        
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            
+            try:
+                step = min(remaining, settings.worker_poll_interval) if polling else remaining
+                return await asyncio.wait_for(queue.get(), timeout=step)
+            except asyncio.TimeoutError:
+                if polling:
+                    job = self.get(job_id)
+                    if job and job.version != version:
+                        return job
+    
+    def detach(self, job_id: str) -> None:
+        """Stop caching a job now run by another process, so reads go to the store."""
+        with self._lock:
+            if job_id in self._dirty:
+                self.flush()
+            self._active.pop(job_id, None)
+    
+    def flush(self) -> None:
+        """Write buffered progress updates to the store in one batch."""
+        with self._lock:
+            jobs = [self._active[job_id] for job_id in self._dirty if job_id in self._active]
+            self._dirty.clear()
+            self._last_flush = time.monotonic()
+            self._write(jobs)
+    
+    def stats(self) -> dict[str, Any]:
+        """Store usage counters."""
+        with self._lock:
+            return {
+                "store": type(self.store).__name__,
+                "active": len(self._active),
+                "pending_writes": len(self._dirty),
+                "writes": self.writes,
+                "buffered_updates": self.buffered_updates,
+                "evicted": self.evicted,
+                "subscribers": sum(len(subs) for subs in self._subscribers.values()),
+            }
+    
+    def _load_active(self, job_id: str) -> Optional[Job]:
+        """Job being updated by this process, loaded from the store if needed."""
+        job = self._active.get(job_id)
+        if not job:
+            data = self.store.load(job_id)
+            if not data:
+                return None
+            job = Job(**data)
+            # Cancelled jobs ignore updates, so nothing would evict them again
+            if job.status != "cancelled":
+                self._active[job_id] = job
+        return job
+    
+    def _commit(self, job: Job, write_through: bool) -> None:
+        """Version an updated job, persist it and notify subscribers."""
+        job.updated_at = time.time()
+        job.version += 1
+        
+        self._dirty.add(job.job_id)
+        if write_through:
+            # State transitions are written through together with any buffered progress
+            self.flush()
+        else:
+            self.buffered_updates += 1
+            if time.monotonic() - self._last_flush >= settings.job_flush_interval:
+                self.flush()
+        
+        if job.status in TERMINAL_STATUSES:
+            self._active.pop(job.job_id, None)
+        
+        self._notify(job)
+    
+    def _write(self, jobs: list[Job]) -> None:
+        """
+        Persist jobs, logging transient failures instead of failing the caller.
+        
+        A schema mismatch is raised: every later write would fail the same way.
+        """
+        if not jobs:
+            return
+        try:
+            self.store.save_many([asdict(job) for job in jobs])
+            self.writes += 1
+        except JobStoreSchemaError:
+            raise
+        except Exception as e:
+            print(f"Failed to persist job state: {e}")
+    
+    def _notify(self, job: Job) -> None:
+        """Push a snapshot to subscribers; safe to call from worker threads."""
+        for loop, queue in self._subscribers.get(job.job_id, []):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, replace(job))
+            except RuntimeError:
+                # Subscriber loop already closed
+                pass
+    
+    def _evict_expired(self) -> None:
+        """Delete finished jobs older than job_ttl, at most once per interval."""
+        now = time.monotonic()
+        if now - self._last_eviction < self.EVICTION_INTERVAL:
+            return
+        self._last_eviction = now
+        
+        try:
+            self.evicted += self.store.delete_finished(time.time() - settings.job_ttl)
+        except Exception as e:
+            print(f"Failed to evict expired jobs: {e}")
+
+
+class WorkerPool:
+    """
+    Bounded pool that runs job tasks.
+    
+    Coroutine tasks run on the event loop and sync tasks on the pool's own
+    threads; both share the same slot limit so one job type cannot starve
+    the others.
+    """
+    
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+    
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run a task once a slot is free."""
+        slots = self._slots()
+        
+        self.queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+        
+        self.active += 1
+        try:
+            if inspect.iscoroutinefunction(fn):
+                result = await fn(*args)
+            else:
+                # Copy the context so the thread knows which job it runs for
+                loop = asyncio.get_running_loop()
+                context = contextvars.copy_context()
+                result = await loop.run_in_executor(self._executor, partial(context.run, fn, *args))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+            slots.release()
+        
+        self.completed += 1
+        return result
+    
+    def stats(self) -> dict[str, Any]:
+        """Queue depth and utilization."""
+        return {
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "queued": self.queued,
+            "utilization": round(self.active / self.max_workers, 2),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+    
+    def _slots(self) -> asyncio.Semaphore:
+        """Slot semaphore for the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+        return self._semaphore
+
+
+class JobExecutor:
+    """Runs job tasks on separately sized pools per kind of work."""
+    
+    def __init__(self):
+        cpu_workers = settings.cpu_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.pools = {
+            # Remote API calls (Veo, Imagen, gTTS, Airtable)
+            "io": WorkerPool("io", settings.io_workers),
+            # ffmpeg encodes; each process already uses several cores
+            "cpu": WorkerPool("cpu", cpu_workers),
+        }
+        self._tasks: set[asyncio.Task] = set()
+        self._jobs: dict[str, asyncio.Task] = {}
+    
+    def submit(self, pool: str, fn: Callable, *args: Any, local: bool = False) -> Optional[asyncio.Task]:
+        """
+        Schedule a job task on a pool without waiting for it.
+        
+        In "queue" execution mode registered tasks are put on the durable
+        task queue for worker processes instead, and None is returned,
+        unless local is set (as it is by the workers themselves).
+        """
+        func, call_args, kwargs = fn, args, {}
+        if isinstance(fn, partial):
+            func, call_args, kwargs = fn.func, fn.args + args, fn.keywords
+        job_id = call_args[0] if call_args else kwargs.get("job_id")
+        
+        if settings.execution_mode == "queue" and not local and task_queue.is_registered(func):
+            task_queue.enqueue(func, call_args, kwargs)
+            job_manager.detach(job_id)
+            return None
+        
+        task = asyncio.ensure_future(self._run(self.pools[pool], job_id, fn, *args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if job_id:
+            self._jobs[job_id] = task
+            task.add_done_callback(lambda done: self._forget(job_id, done))
+        return task
+    
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Stop the task of a job running in this process.
+        
+        Kills the job's ffmpeg processes and cancels its task, which
+        interrupts polling loops at their next await; the pool slot is freed
+        as soon as the task unwinds.
+        
+        Returns:
+            True if a task of the job was running here
+        """
+        task = self._jobs.get(job_id)
+        if task and not task.done():
+            task.cancel()
+        await asyncio.to_thread(ffmpeg_runner.cancel, job_id)
+        
+        if not task:
+            return False
+        await asyncio.wait({task}, timeout=settings.cancel_grace_seconds)
+        return True
+    
+    def stats(self) -> dict[str, Any]:
+        """Statistics per pool."""
+        return {name: pool.stats() for name, pool in self.pools.items()}
+    
+    def _forget(self, job_id: str, task: asyncio.Task) -> None:
+        """Drop a finished task unless the job was resubmitted meanwhile."""
+        if self._jobs.get(job_id) is task:
+            del self._jobs[job_id]
+    
+    @staticmethod
+    async def _run(pool: WorkerPool, job_id: Optional[str], fn: Callable, *args: Any) -> None:
+        """Run a task, logging errors the task did not handle itself."""
+        current_job_id.set(job_id)
+        try:
+            await pool.run(fn, *args)
+        except asyncio.CancelledError:
+            print(f"Cancelled {pool.name} task of job {job_id}")
+        except Exception as e:
+            name = getattr(fn, "__name__", None) or getattr(fn, "func", fn).__name__
+            print(f"Unhandled error in {pool.name} task {name}: {e}")
 
 
 # Global job manager instance
 job_manager = JobManager()
+
+# Global job executor instance
+job_executor = JobExecutor()
@@ -0,0 +1,140 @@
+"""Dependency-graph execution of multi-stage jobs."""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from src.api.jobs import job_manager
+
+
+# Stage callables receive the artifacts of their dependencies and a
+# report(progress, message=None) callback, and return their own artifact.
+StageFn = Callable[[dict[str, Any], Callable[..., None]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    """A pipeline step and the stages whose artifacts it needs."""
+    name: str
+    run: StageFn
+    depends_on: list[str] = field(default_factory=list)
+    weight: float = 1.0  # Share of the overall job progress
+
+
+class Pipeline:
+    """
+    Runs the stages of a job as a dependency graph.
+    
+    Every stage starts as soon as all of its dependencies have finished,
+    so independent stages run concurrently. Artifacts (usually paths) are
+    handed from stage to stage in memory. The first failure cancels the
+    stages still running or waiting.
+    """
+    
+    def __init__(self, job_id: str, stages: list[Stage]):
+        self.job_id = job_id
+        self.stages = {stage.name: stage for stage in stages}
+        self._order = self._topological_order()
+        self._progress = {name: 0 for name in self.stages}
+    
+    async def run(self) -> dict[str, Any]:
+        """
+        Execute all stages.
+        
+        Returns:
+            Artifact of every stage, by stage name
+        """
+        for name in self._order:
+            job_manager.update_stage(self.job_id, name, status="pending", progress=0)
+        
+        artifacts: dict[str, Any] = {}
+        tasks: dict[str, asyncio.Task] = {}
+        for name in self._order:
+            # Dependencies come first in topological order, so their tasks exist
+            tasks[name] = asyncio.ensure_future(self._run_stage(self.stages[name], tasks, artifacts))
+        
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        
+        return artifacts
+    
+    async def _run_stage(
+        self,
+        stage: Stage,
+        tasks: dict[str, asyncio.Task],
+        artifacts: dict[str, Any]
+    ) -> None:
+        """Wait for dependencies, then run one stage and record its artifact."""
+        try:
+            await asyncio.gather(*(tasks[name] for name in stage.depends_on))
+        except BaseException:
+            # A dependency failed or the job was stopped: this stage never runs
+            self._report(stage.name, status="cancelled")
+            raise
+        
+        def report(progress: int, message: Optional[str] = None) -> None:
+            self._report(stage.name, progress=progress, message=message)
+        
+        self._report(stage.name, status="processing", progress=0)
+        try:
+            artifacts[stage.name] = await stage.run(
+                {name: artifacts[name] for name in stage.depends_on}, report
+            )
+        except asyncio.CancelledError:
+            self._report(stage.name, status="cancelled")
+            raise
+        except Exception as e:
+            self._report(stage.name, status="failed", message=str(e))
+            raise
+        
+        self._report(stage.name, status="completed", progress=100)
+    
+    def _report(
+        self,
+        name: str,
+        status: Optional[str] = None,
+        progress: Optional[int] = None,
+        message: Optional[str] = None
+    ) -> None:
+        """Update a stage and the weighted overall progress of the job."""
+        if progress is not None:
+            self._progress[name] = progress
+        
+        total_weight = sum(stage.weight for stage in self.stages.values())
+        overall = sum(self._progress[n] * stage.weight for n, stage in self.stages.items()) / total_weight
+        
+        job_manager.update_stage(
+            self.job_id,
+            name,
+            status=status,
+            progress=progress,
+            message=message,
+            job_progress=min(int(overall), 99)
+        )
+    
+    def _topological_order(self) -> list[str]:
+        """Order stages so dependencies come first; reject unknown stages and cycles."""
+        order: list[str] = []
+        visiting: set[str] = set()
+        
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle at stage '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown pipeline stage '{name}'")
+            
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+        
+        for name in self.stages:
+            visit(name)
+        return order
@@ -0,0 +1,112 @@
+"""Poster frames, animated previews and contact sheets of finished videos."""
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from src.core.composer import VideoComposer
+from src.core.config import settings
+from src.api.jobs import job_manager
+from src.api.retention import retention_manager
+
+
+class PreviewGenerator:
+    """
+    Gallery previews of finished videos, stored next to the video.
+    
+    The poster, animated preview and contact sheet come from a single
+    keyframe-only ffmpeg run, so a job gains well under a second. Previews
+    newer than their video are reused.
+    """
+    
+    # result_urls key and file name suffix of each preview
+    FILES = {
+        "poster": "poster.jpg",
+        "preview": "preview.mp4",
+        "contact_sheet": "sheet.jpg",
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        
+        self.generated = 0
+        self.reused = 0
+        self.failed = 0
+        self.seconds = 0.0
+    
+    def paths(self, job_id: str, video_path: Path) -> dict[str, Path]:
+        """Preview files of a job, in the directory of its video."""
+        return {key: video_path.with_name(f"{job_id}_{suffix}") for key, suffix in self.FILES.items()}
+    
+    def generate(self, job_id: str, video_path: Path, force: bool = False) -> dict[str, str]:
+        """
+        Create the previews of a video unless they are up to date.
+        
+        Failures are logged and never fail the job.
+        
+        Args:
+            job_id: Job the video belongs to
+            video_path: Finished video
+            force: Render again even if the previews are up to date
+        
+        Returns:
+            Download URL of each preview, or an empty dict on failure
+        """
+        paths = self.paths(job_id, video_path)
+        if not force and self._is_fresh(video_path, paths):
+            with self._lock:
+                self.reused += 1
+            return self._urls(paths)
+        
+        started = time.monotonic()
+        try:
+            ok = VideoComposer().render_previews(
+                video_path, paths["poster"], paths["preview"], paths["contact_sheet"]
+            )
+        except Exception as e:
+            print(f"Previews of {job_id} failed: {e}")
+            ok = False
+        
+        with self._lock:
+            if ok:
+                self.generated += 1
+                self.seconds += time.monotonic() - started
+            else:
+                self.failed += 1
+        if not ok:
+            return {}
+        
+        for path in paths.values():
+            retention_manager.track(path)
+        return self._urls(paths)
+    
+    def publish(self, job_id: str, urls: dict[str, str]) -> None:
+        """Add preview URLs to the result_urls of a completed job."""
+        job_manager.merge_result_urls(job_id, urls)
+    
+    def stats(self) -> dict[str, Any]:
+        """Preview counters and average render time."""
+        with self._lock:
+            return {
+                "generated": self.generated,
+                "reused": self.reused,
+                "failed": self.failed,
+                "avg_seconds": round(self.seconds / self.generated, 2) if self.generated else None,
+            }
+    
+    @staticmethod
+    def _is_fresh(video_path: Path, paths: dict[str, Path]) -> bool:
+        """Whether every preview exists and is newer than the video."""
+        try:
+            video_mtime = video_path.stat().st_mtime_ns
+            return all(path.stat().st_mtime_ns >= video_mtime for path in paths.values())
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _urls(paths: dict[str, Path]) -> dict[str, str]:
+        return {key: f"/api/v1/download/{path.name}" for key, path in paths.items()}
+
+
+# Global preview generator instance
+preview_generator = PreviewGenerator()
@@ -0,0 +1,151 @@
+"""Delivery renditions of finished videos, rendered on demand."""
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Optional
+
+from src.core.composer import RENDITIONS, VideoComposer
+from src.core.config import settings
+from src.api.retention import retention_manager
+
+
+class RenditionError(Exception):
+    """Raised when renditions could not be rendered."""
+
+
+class RenditionCache:
+    """
+    Renditions of finished videos, rendered on first request and kept on disk.
+    
+    Renditions requested together are rendered in one ffmpeg run that decodes
+    the source once. A request for a rendition that is already being
+    rendered waits for that run instead of starting another (single-flight).
+    A rendition older than its source is rendered again.
+    """
+    
+    # Final output of a job, in order of preference
+    SOURCES = ("{job_id}_final.mp4", "{job_id}_video_with_subtitles.mp4", "{job_id}_video.mp4")
+    
+    def __init__(self, output_dir: Optional[Path] = None):
+        self.output_dir = output_dir or settings.output_dir
+        self._in_flight: dict[Path, Future] = {}
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.renders = 0
+        self.coalesced = 0
+        self.failures = 0
+    
+    def source(self, job_id: str) -> Optional[Path]:
+        """Video the renditions of a job are made from, if it exists."""
+        for pattern in self.SOURCES:
+            path = self.output_dir / pattern.format(job_id=job_id)
+            if path.exists():
+                return path
+        return None
+    
+    def path(self, job_id: str, name: str) -> Path:
+        """Where a rendition of a job is stored."""
+        return self.output_dir / f"{job_id}_rendition_{name}.mp4"
+    
+    def is_fresh(self, job_id: str, name: str) -> bool:
+        """Whether a rendition exists and is newer than its source."""
+        source = self.source(job_id)
+        path = self.path(job_id, name)
+        try:
+            return source is not None and path.stat().st_mtime_ns >= source.stat().st_mtime_ns
+        except OSError:
+            return False
+    
+    def ensure(self, job_id: str, names: list[str]) -> dict[str, Path]:
+        """
+        Render the missing renditions of a job and wait for them.
+        
+        Blocks until every rendition exists; call it from a worker thread.
+        
+        Args:
+            job_id: Job whose video to render
+            names: Rendition names (keys of RENDITIONS)
+        
+        Returns:
+            Path of every requested rendition
+        
+        Raises:
+            KeyError: If a rendition name is unknown
+            FileNotFoundError: If the job has no video
+            RenditionError: If rendering failed
+        """
+        unknown = [name for name in names if name not in RENDITIONS]
+        if unknown:
+            raise KeyError(f"Unknown rendition: {', '.join(unknown)}")
+        source = self.source(job_id)
+        if source is None:
+            raise FileNotFoundError(f"Video not found: {job_id}")
+        
+        owned: dict[str, Future] = {}
+        waiting: list[Future] = []
+        with self._lock:
+            for name in dict.fromkeys(names):
+                path = self.path(job_id, name)
+                if path in self._in_flight:
+                    self.coalesced += 1
+                    waiting.append(self._in_flight[path])
+                elif self.is_fresh(job_id, name):
+                    self.hits += 1
+                else:
+                    owned[name] = self._in_flight[path] = Future()
+        
+        if owned:
+            self._render(job_id, source, owned)
+        for future in [*owned.values(), *waiting]:
+            future.result()
+        
+        for name in names:
+            retention_manager.touch(self.path(job_id, name))
+        return {name: self.path(job_id, name) for name in names}
+    
+    def stats(self) -> dict[str, Any]:
+        """Render counters."""
+        with self._lock:
+            return {
+                "in_flight": len(self._in_flight),
+                "hits": self.hits,
+                "renders": self.renders,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+            }
+    
+    def _render(self, job_id: str, source: Path, owned: dict[str, Future]) -> None:
+        """Render renditions in one run and resolve their futures."""
+        paths = {name: self.path(job_id, name) for name in owned}
+        # Render next to the target so the rename never crosses filesystems
+        # and a half-written file is never served under its final name
+        temp_paths = {name: path.with_suffix(".part.mp4") for name, path in paths.items()}
+        try:
+            outputs = {temp_paths[name]: RENDITIONS[name] for name in owned}
+            if not VideoComposer().render_renditions(source, outputs):
+                raise RenditionError(f"Failed to render renditions of {source.name}")
+            for name, path in paths.items():
+                temp_paths[name].replace(path)
+                retention_manager.track(path)
+            error = None
+        except Exception as e:
+            error = e if isinstance(e, RenditionError) else RenditionError(str(e))
+            for temp_path in temp_paths.values():
+                temp_path.unlink(missing_ok=True)
+        
+        with self._lock:
+            for name, future in owned.items():
+                del self._in_flight[paths[name]]
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(paths[name])
+            if error:
+                self.failures += 1
+            else:
+                self.renders += len(owned)
+
+
+# Global rendition cache instance
+rendition_cache = RenditionCache()
@@ -0,0 +1,360 @@
+"""Disk retention for generated artifacts."""
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from src.core.config import settings
+from src.core.probe import media_probe
+from src.api.job_store import TERMINAL_STATUSES
+from src.api.jobs import job_manager
+
+
+@dataclass
+class Artifact:
+    """A tracked file in output_dir or temp_dir."""
+    path: str
+    kind: str
+    size: int
+    last_access: float
+    tracked_at: float
+
+
+class RetentionManager:
+    """
+    Keeps output_dir and temp_dir within a disk budget.
+    
+    Files are tracked in an index as they are written or downloaded. Each
+    background tick discovers a bounded batch of untracked files, deletes
+    artifacts past the TTL of their type, then the least recently
+    downloaded ones while usage is over budget. Files of unfinished jobs,
+    and files those jobs reference, are never deleted. An HLS playlist and
+    the segments it lists are one artifact, so a stream is never left
+    partially deleted.
+    """
+    
+    def __init__(
+        self,
+        directories: Optional[list[Path]] = None,
+        index_path: Optional[Path] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.directories = directories or [settings.output_dir, settings.temp_dir]
+        self.index_path = index_path or settings.data_dir / "retention_index.json"
+        self.max_bytes = max_bytes or settings.retention_max_bytes
+        
+        # Only the API process writes the index; queue workers leave it alone
+        # and the API's sweep discovers the files they write
+        self.persist = True
+        
+        self._artifacts: dict[str, Artifact] = {}
+        self._references: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        
+        # Incremental sweep state: one directory listing consumed across ticks
+        self._sweep: Optional[Iterator[os.DirEntry]] = None
+        self._sweep_index = 0
+        self._sweep_started = 0.0
+        self._seen: set[str] = set()
+        
+        self.evicted_files = 0
+        self.reclaimed_bytes = 0
+        self.reclaimed_by_kind: dict[str, int] = {}
+        
+        self._load()
+    
+    def track(self, path: Path) -> None:
+        """Register a newly written artifact; HLS segments count towards their playlist."""
+        path = self._unit(path)
+        segments = self._segments(path)
+        try:
+            size = self._size(path, segments)
+        except OSError:
+            return
+        
+        now = time.time()
+        with self._lock:
+            for segment in segments:
+                self._artifacts.pop(str(segment), None)
+            artifact = self._artifacts.get(str(path))
+            if artifact:
+                artifact.size = size
+                artifact.tracked_at = now
+            else:
+                self._artifacts[str(path)] = Artifact(
+                    path=str(path),
+                    kind=self._kind(path),
+                    size=size,
+                    last_access=now,
+                    tracked_at=now
+                )
+    
+    def touch(self, path: Path) -> None:
+        """Record a download so the artifact is evicted last."""
+        path = self._unit(path)
+        with self._lock:
+            artifact = self._artifacts.get(str(path))
+            if artifact and artifact.kind == "stream":
+                # Segment requests are frequent; the stream was measured when tracked
+                artifact.last_access = time.time()
+                return
+        self.track(path)
+        with self._lock:
+            artifact = self._artifacts.get(str(path))
+            if artifact:
+                artifact.last_access = time.time()
+    
+    def reference(self, job_id: str, *paths: Path) -> None:
+        """Protect files used by a job until it finishes."""
+        with self._lock:
+            self._references.setdefault(job_id, set()).update(str(path) for path in paths)
+    
+    def start(self) -> None:
+        """Run ticks in the background on the current event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop background ticks and persist the index."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            self._save()
+    
+    def tick(self) -> int:
+        """
+        Run one bounded retention pass.
+        
+        Returns:
+            Bytes reclaimed by this pass
+        """
+        with self._lock:
+            reclaimed = self.reclaimed_bytes
+            self._sweep_batch(settings.retention_sweep_batch)
+            self._evict()
+            self._save()
+            return self.reclaimed_bytes - reclaimed
+    
+    def stats(self) -> dict[str, Any]:
+        """Usage per artifact type and reclaimed space."""
+        with self._lock:
+            usage: dict[str, dict[str, int]] = {}
+            for artifact in self._artifacts.values():
+                kind = usage.setdefault(artifact.kind, {"files": 0, "bytes": 0})
+                kind["files"] += 1
+                kind["bytes"] += artifact.size
+            
+            return {
+                "bytes": sum(kind["bytes"] for kind in usage.values()),
+                "max_bytes": self.max_bytes,
+                "usage": usage,
+                "evicted_files": self.evicted_files,
+                "reclaimed_bytes": self.reclaimed_bytes,
+                "reclaimed_by_kind": dict(self.reclaimed_by_kind),
+                "referenced_jobs": len(self._references),
+            }
+    
+    async def _run(self) -> None:
+        """Tick every retention_interval seconds."""
+        while True:
+            await asyncio.sleep(settings.retention_interval)
+            try:
+                reclaimed = await asyncio.to_thread(self.tick)
+                if reclaimed:
+                    print(f"Retention reclaimed {reclaimed} bytes")
+            except Exception as e:
+                print(f"Retention pass failed: {e}")
+    
+    def _kind(self, path: Path) -> str:
+        """Artifact type of a file, used for TTLs and reporting."""
+        name = path.name
+        if name.endswith((".part", ".part.mp4")):
+            return "partial"
+        if path.parent == settings.temp_dir:
+            if "_segment_" in name:
+                return "segment"
+            if name.endswith(".srt"):
+                return "subtitle"
+            if name.endswith(("_face.jpg", "_body.jpg", "_side.jpg")):
+                return "upload"
+            return "temp"
+        if name.endswith(".mp4"):
+            return "video"
+        if name.endswith((".m3u8", ".ts")):
+            return "stream"
+        if name.endswith(".mp3"):
+            return "voiceover"
+        if name.endswith((".jpg", ".jpeg", ".png")):
+            return "image"
+        return "other"
+    
+    @staticmethod
+    def _unit(path: Path) -> Path:
+        """Playlist an HLS segment is retained with, or the path itself."""
+        if path.suffix == ".ts":
+            playlist = path.with_name(f"{path.stem.rsplit('_', 1)[0]}.m3u8")
+            if playlist.exists():
+                return playlist
+        return path
+    
+    @staticmethod
+    def _segments(path: Path) -> list[Path]:
+        """Segments listed in an HLS playlist; empty for any other file."""
+        if path.suffix != ".m3u8":
+            return []
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return []
+        return [path.with_name(line.strip()) for line in lines if line.strip() and not line.startswith("#")]
+    
+    @staticmethod
+    def _size(path: Path, segments: list[Path]) -> int:
+        """Size of a file together with its segments."""
+        return path.stat().st_size + sum(segment.stat().st_size for segment in segments if segment.exists())
+    
+    def _sweep_batch(self, limit: int) -> None:
+        """Index up to limit directory entries, resuming the previous listing."""
+        for _ in range(limit):
+            if self._sweep is None:
+                directory = self.directories[self._sweep_index]
+                self._sweep = os.scandir(directory) if directory.exists() else iter(())
+                self._sweep_started = time.time()
+                self._seen = set()
+            
+            entry = next(self._sweep, None)
+            if entry is None:
+                self._finish_sweep()
+                return
+            
+            try:
+                if not entry.is_file():
+                    continue
+                self._seen.add(entry.path)
+                path = self._unit(Path(entry.path))
+                if str(path) not in self._artifacts:
+                    segments = self._segments(path)
+                    for segment in segments:
+                        self._artifacts.pop(str(segment), None)
+                    self._artifacts[str(path)] = Artifact(
+                        path=str(path),
+                        kind=self._kind(path),
+                        size=self._size(path, segments),
+                        last_access=path.stat().st_mtime,
+                        tracked_at=time.time()
+                    )
+            except OSError:
+                continue
+    
+    def _finish_sweep(self) -> None:
+        """Forget files that disappeared, then move on to the next directory."""
+        directory = self.directories[self._sweep_index]
+        gone = []
+        for path, artifact in list(self._artifacts.items()):
+            if (
+                Path(path).parent == directory
+                and path not in self._seen
+                and artifact.tracked_at < self._sweep_started
+            ):
+                del self._artifacts[path]
+                gone.append(Path(path))
+        media_probe.forget(*gone)
+        
+        if hasattr(self._sweep, "close"):
+            self._sweep.close()
+        self._sweep = None
+        self._sweep_index = (self._sweep_index + 1) % len(self.directories)
+    
+    def _evict(self) -> None:
+        """Delete expired artifacts, then least recently downloaded ones over budget."""
+        pinned = self._pinned_paths()
+        now = time.time()
+        total = sum(artifact.size for artifact in self._artifacts.values())
+        
+        for artifact in sorted(self._artifacts.values(), key=lambda artifact: artifact.last_access):
+            ttl = settings.retention_ttls.get(artifact.kind, settings.retention_ttls["other"])
+            if now - artifact.last_access <= ttl and total <= self.max_bytes:
+                continue
+            if artifact.path in pinned or self._is_running(self._job_id(artifact.path)):
+                continue
+            
+            self._delete(artifact)
+            total -= artifact.size
+    
+    def _pinned_paths(self) -> set[str]:
+        """Paths referenced by unfinished jobs; references of finished jobs are dropped."""
+        pinned = set()
+        for job_id, paths in list(self._references.items()):
+            if self._is_running(job_id):
+                pinned |= paths
+            else:
+                del self._references[job_id]
+        return pinned
+    
+    @staticmethod
+    def _job_id(path: str) -> str:
+        """Job ID prefix of an artifact file name."""
+        return Path(path).name.split("_", 1)[0]
+    
+    @staticmethod
+    def _is_running(job_id: str) -> bool:
+        job = job_manager.get(job_id)
+        return job is not None and job.status not in TERMINAL_STATUSES
+    
+    def _delete(self, artifact: Artifact) -> None:
+        """Remove an artifact, with the segments of a playlist, from disk and from the index."""
+        path = Path(artifact.path)
+        # Segments go first so a playlist never points at missing segments
+        files = [*self._segments(path), path]
+        try:
+            for file in files:
+                file.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Failed to delete {artifact.path}: {e}")
+            return
+        
+        del self._artifacts[artifact.path]
+        media_probe.forget(*files)
+        self.evicted_files += 1
+        self.reclaimed_bytes += artifact.size
+        self.reclaimed_by_kind[artifact.kind] = self.reclaimed_by_kind.get(artifact.kind, 0) + artifact.size
+    
+    def _load(self) -> None:
+        """Load the persisted index."""
+        if not self.index_path.exists():
+            return
+        
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            for artifact in data.get("artifacts", []):
+                self._artifacts[artifact["path"]] = Artifact(**artifact)
+        except Exception as e:
+            print(f"Ignoring unreadable retention index: {e}")
+    
+    def _save(self) -> None:
+        """Persist the index atomically."""
+        if not self.persist:
+            return
+        data = {"artifacts": [asdict(artifact) for artifact in self._artifacts.values()]}
+        
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            temp_path.replace(self.index_path)
+        except Exception as e:
+            print(f"Failed to save retention index: {e}")
+
+
+# Global retention manager instance
+retention_manager = RetentionManager()
@@ -1,11 +1,18 @@
 """Character generation routes."""
+import asyncio
 import uuid
 from pathlib import Path
-from fastapi import APIRouter, BackgroundTasks, Form
+from typing import Optional
+from fastapi import APIRouter, Form, Header, HTTPException
 
 from src.core import CharacterGenerator, settings
 from src.api.schemas import JobStatus
 from src.api.jobs import job_manager
+from src.api.cache import GenerationCache, generation_cache
+from src.api.admission import admission_controller
+from src.api.retention import retention_manager
+from src.api.task_queue import task_queue
+from src.api.routes.helpers import check_admission, to_job_status
 from src.integrations.airtable import get_airtable_manager
 
 router = APIRouter(prefix="/api/v1/character", tags=["Character"])
@@ -13,20 +20,46 @@ router = APIRouter(prefix="/api/v1/character", tags=["Character"])
 
 @router.post("/generate", response_model=JobStatus)
 async def generate_character(
-    background_tasks: BackgroundTasks,
     description: str = Form(...),
+    priority: str = Form("interactive"),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
     Generate character reference images.
     
     - **description**: Detailed character description
+    - **priority**: Queue priority, interactive or batch (default: interactive)
+    
+    Responds 429 with Retry-After when the generation queue is full.
+    Identical descriptions reuse the finished (or still running) job.
     
     Returns job_id to track progress.
     """
+    cache_key = GenerationCache.make_key(
+        "character",
+        description=description,
+        aspect_ratio=settings.default_aspect_ratio,
+        model=settings.imagen_model
+    )
+    existing_job_id = generation_cache.resolve(cache_key, idempotency_key)
+    if existing_job_id:
+        job = job_manager.get(existing_job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return to_job_status(existing_job_id, job)
+    
+    check_admission(priority)
+    
     job_id = str(uuid.uuid4())
-    job_manager.create(job_id)
+    job_manager.create(job_id, "character")
+    generation_cache.begin(cache_key, job_id, idempotency_key)
     
-    background_tasks.add_task(_generate_character_task, job_id, description)
+    admission_controller.submit(
+        settings.imagen_model,
+        _generate_character_task,
+        job_id, description, cache_key,
+        priority=priority
+    )
     
     return JobStatus(
         job_id=job_id,
@@ -36,7 +69,12 @@ async def generate_character(
     )
 
 
-def _generate_character_task(job_id: str, description: str):
+@task_queue.task("io")
+async def _generate_character_task(
+    job_id: str,
+    description: str,
+    cache_key: Optional[str] = None
+):
     """Background task to generate character images."""
     airtable = get_airtable_manager()
     airtable_record_id = None
@@ -48,21 +86,27 @@ def _generate_character_task(job_id: str, description: str):
         
         # Generate only face image (most important for video generation)
         face_path = settings.output_dir / f"{job_id}_face.jpg"
-        face_result = generator.generate_face(description, face_path)
+        face_result = await generator.generate_face_async(description, face_path)
         
         if not face_result:
             raise Exception("Failed to generate face reference image")
+        retention_manager.track(face_result)
         
         # Complete with face URL
+        result_url = f"/api/v1/download/{job_id}_face.jpg"
         job_manager.complete(
             job_id, 
-            f"/api/v1/download/{job_id}_face.jpg",
+            result_url,
             "Character face generated successfully"
         )
         
+        if cache_key:
+            generation_cache.finish(cache_key, job_id, result_url, [face_result])
+        
         if airtable:
             try:
-                airtable_record_id = airtable.create_character_record(
+                airtable_record_id = await asyncio.to_thread(
+                    airtable.create_character_record,
                     job_id=job_id,
                     description=description,
                     face_image_path=str(face_result),
@@ -74,8 +118,11 @@ def _generate_character_task(job_id: str, description: str):
     except Exception as e:
         job_manager.fail(job_id, str(e))
         
+        if cache_key:
+            generation_cache.abandon(cache_key)
+        
         if airtable and airtable_record_id:
             try:
-                airtable.update_record_status(airtable_record_id, "Failed", str(e))
+                await asyncio.to_thread(airtable.update_record_status, airtable_record_id, "Failed", str(e))
             except:
                 pass
@@ -1,9 +1,22 @@
 """Health check routes."""
 import time
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
 from src.core.config import settings
+from src.core.clients import client_pool
+from src.core.poller import operation_poller
+from src.core.download import video_downloader
+from src.core.ffmpeg import ffmpeg_runner
+from src.core.probe import media_probe
 from src.api.schemas import HealthResponse
+from src.api.cache import generation_cache
+from src.api.hls import hls_packager
+from src.api.previews import preview_generator
+from src.api.renditions import rendition_cache
+from src.api.admission import admission_controller
+from src.api.retention import retention_manager
+from src.api.task_queue import task_queue
+from src.api.jobs import job_executor, job_manager
 
 router = APIRouter(tags=["Health"])
 
@@ -19,6 +32,8 @@ async def root():
             "health": "/health",
             "character": "/api/v1/character/generate",
             "video": "/api/v1/video/generate",
+            "long_video": "/api/v1/video/generate-long",
+            "pipeline": "/api/v1/pipeline/generate",
             "voiceover": "/api/v1/voiceover/generate",
             "job_status": "/api/v1/job/{job_id}",
             "download": "/api/v1/download/{filename}"
@@ -27,11 +42,39 @@ async def root():
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint."""
+async def health_check(response: Response):
+    """Health check endpoint (503 while the generation queue is full)."""
+    queue_depth = admission_controller.depth()
+    saturated = queue_depth >= admission_controller.max_queue
+    if saturated:
+        response.status_code = 503
+    
     return HealthResponse(
-        status="healthy",
-        api_key_configured=bool(settings.gemini_api_key),
+        status="saturated" if saturated else "healthy",
+        api_key_configured=bool(settings.api_keys),
         airtable_enabled=settings.airtable_enabled,
+        queue_depth=queue_depth,
+        estimated_wait_seconds=round(admission_controller.estimated_wait(), 1),
         timestamp=time.time()
     )
+
+
+@router.get("/health/stats")
+async def health_stats():
+    """Internal statistics of shared services."""
+    return {
+        "api_keys": client_pool.stats(),
+        "poller": operation_poller.stats(),
+        "downloads": video_downloader.stats(),
+        "cache": generation_cache.stats(),
+        "admission": admission_controller.stats(),
+        "pools": job_executor.stats(),
+        "jobs": job_manager.stats(),
+        "retention": retention_manager.stats(),
+        "media_probe": media_probe.stats(),
+        "renditions": rendition_cache.stats(),
+        "hls": hls_packager.stats(),
+        "previews": preview_generator.stats(),
+        "ffmpeg": ffmpeg_runner.stats(),
+        "task_queue": task_queue.stats() if settings.execution_mode == "queue" else None,
+    }
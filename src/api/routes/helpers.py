@@ -0,0 +1,85 @@
+"""Request helpers shared by route modules."""
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+
+from src.core import settings
+from src.api.schemas import JobStatus
+from src.api.jobs import Job
+from src.api.admission import PRIORITIES, QueueFullError, admission_controller
+
+
+async def read_character_image(
+    job_id: str,
+    character_face: Optional[UploadFile],
+    character_job_id: Optional[str],
+    character_image_type: str
+) -> tuple[Path, bytes]:
+    """Resolve the reference image from an upload or a character job."""
+    if character_job_id:
+        # Use image from previous character generation
+        face_path = settings.output_dir / f"{character_job_id}_{character_image_type}.jpg"
+        if not face_path.exists():
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Character image not found for job {character_job_id}"
+            )
+        return face_path, face_path.read_bytes()
+    
+    if character_face:
+        # Uploaded images are only written once the job is actually launched
+        return settings.temp_dir / f"{job_id}_face.jpg", await character_face.read()
+    
+    raise HTTPException(
+        status_code=400,
+        detail="Either character_face or character_job_id must be provided"
+    )
+
+
+def check_admission(priority: str):
+    """Reject unknown priorities and requests that would overflow the queue."""
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"priority must be one of: {', '.join(PRIORITIES)}"
+        )
+    
+    try:
+        admission_controller.ensure_capacity()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def create_srt_file(output_path: Path, subtitle_text: str, duration: Optional[float] = None):
+    """Create SRT subtitle file."""
+    # Simple SRT format: one subtitle for the entire video duration
+    millis = int((duration or 8) * 1000)
+    end = f"{millis // 3600000:02}:{millis // 60000 % 60:02}:{millis // 1000 % 60:02},{millis % 1000:03}"
+    srt_content = f"""1
+00:00:00,000 --> {end}
+{subtitle_text}
+"""
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(srt_content, encoding='utf-8')
+
+
+def to_job_status(job_id: str, job: Job) -> JobStatus:
+    """Build the API response for a job."""
+    return JobStatus(
+        job_id=job_id,
+        status=job.status,
+        progress=job.progress,
+        message=job.message,
+        result_url=job.result_url,
+        result_urls=job.result_urls,
+        error=job.error,
+        version=job.version,
+        job_type=job.job_type or None,
+        created_at=job.created_at,
+        stages=job.stages
+    )
@@ -0,0 +1,79 @@
+"""Job listing and bulk status routes."""
+import base64
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+
+from src.api.schemas import BulkJobStatusRequest, BulkJobStatusResponse, JobListResponse
+from src.api.jobs import job_manager
+from src.api.routes.helpers import to_job_status
+
+router = APIRouter(prefix="/api/v1", tags=["Jobs"])
+
+
+@router.post("/jobs/status", response_model=BulkJobStatusResponse)
+async def get_jobs_status(request: BulkJobStatusRequest):
+    """
+    Get the status of many jobs at once (up to 500).
+    
+    Unknown job IDs are returned in `missing`.
+    """
+    job_ids = list(dict.fromkeys(request.job_ids))
+    jobs = job_manager.get_many(job_ids)
+    
+    return BulkJobStatusResponse(
+        jobs=[to_job_status(job_id, jobs[job_id]) for job_id in job_ids if job_id in jobs],
+        missing=[job_id for job_id in job_ids if job_id not in jobs]
+    )
+
+
+@router.get("/jobs", response_model=JobListResponse)
+async def list_jobs(
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    created_after: Optional[float] = None,
+    created_before: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    List jobs, newest first.
+    
+    - **status**: pending, processing, completed, failed or cancelled
+    - **job_type**: character, video, long_video, subtitles or voiceover
+    - **created_after** / **created_before**: Unix timestamps bounding the creation time
+    - **cursor**: `next_cursor` of the previous page
+    - **limit**: Page size (default: 50, max: 500)
+    """
+    jobs = job_manager.list_jobs(
+        status=status,
+        job_type=job_type,
+        created_after=created_after,
+        created_before=created_before,
+        cursor=_decode_cursor(cursor) if cursor else None,
+        limit=limit
+    )
+    
+    next_cursor = None
+    if len(jobs) == limit:
+        next_cursor = _encode_cursor(jobs[-1].created_at, jobs[-1].job_id)
+    
+    return JobListResponse(
+        jobs=[to_job_status(job.job_id, job) for job in jobs],
+        next_cursor=next_cursor
+    )
+
+
+def _encode_cursor(created_at: float, job_id: str) -> str:
+    """Opaque cursor pointing after a job."""
+    payload = json.dumps([created_at, job_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[float, str]:
+    """Parse a cursor produced by _encode_cursor."""
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(created_at), str(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
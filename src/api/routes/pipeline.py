@@ -0,0 +1,230 @@
+"""End-to-end pipeline routes."""
+import asyncio
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+from fastapi import APIRouter, Form, File, UploadFile, HTTPException
+
+from src.core import AudioGenerator, CharacterGenerator, VideoComposer, VideoGenerator, media_probe, settings
+from src.core.composer import AudioTrack, Clip, Composition, Subtitles
+from src.api.schemas import JobStatus
+from src.api.jobs import job_executor, job_manager
+from src.api.admission import admission_controller
+from src.api.hls import hls_packager
+from src.api.previews import preview_generator
+from src.api.pipeline import Pipeline, Stage
+from src.api.retention import retention_manager
+from src.api.task_queue import task_queue
+from src.api.routes.helpers import check_admission, create_srt_file, read_character_image
+
+router = APIRouter(prefix="/api/v1/pipeline", tags=["Pipeline"])
+
+
+@router.post("/generate", response_model=JobStatus)
+async def generate_pipeline(
+    prompt: str = Form(...),
+    product_description: str = Form(...),
+    character_description: str = Form(None),
+    character_face: UploadFile = File(None),
+    character_job_id: str = Form(None),
+    character_image_type: str = Form("face"),
+    voiceover_script: str = Form(None),
+    language: str = Form("en"),
+    subtitle_text: str = Form(None),
+    font_size: int = Form(24),
+    font_color: str = Form("white"),
+    aspect_ratio: str = Form("9:16"),
+    duration_seconds: int = Form(8),
+    priority: str = Form("interactive")
+):
+    """
+    Produce a finished ad from a single brief.
+    
+    Stages run as a dependency graph inside the server: the character
+    image, then the Veo video, while the voiceover is synthesized in
+    parallel; then voiceover and subtitles are added to the video in a
+    single encode.
+    Progress of every stage is reported in `stages` of the job status.
+    
+    - **prompt**: Video generation prompt
+    - **product_description**: Product/content description
+    - **character_description**: Description to generate the character from - optional if an image is provided
+    - **character_face**: Character face reference image (upload) - optional
+    - **character_job_id**: Job ID from character generation - optional
+    - **character_image_type**: Which image to use from character job (face, body, side) - default: face
+    - **voiceover_script**: Voiceover text (optional; no voiceover without it)
+    - **language**: Voiceover language code (default: en)
+    - **subtitle_text**: Subtitle text (optional; no subtitles without it)
+    - **font_size** / **font_color**: Subtitle style
+    - **aspect_ratio**: Video aspect ratio (default: 9:16)
+    - **duration_seconds**: Video duration (default: 8, max: 8)
+    - **priority**: Queue priority, interactive or batch (default: interactive)
+    
+    Returns job_id to track progress.
+    """
+    job_id = str(uuid.uuid4())
+    
+    face_path = None
+    if character_face or character_job_id:
+        face_path, face_bytes = await read_character_image(
+            job_id, character_face, character_job_id, character_image_type
+        )
+    elif not character_description:
+        raise HTTPException(
+            status_code=400,
+            detail="One of character_description, character_face or character_job_id must be provided"
+        )
+    
+    check_admission(priority)
+    
+    if character_face and not character_job_id:
+        # Save uploaded image
+        face_path.parent.mkdir(parents=True, exist_ok=True)
+        face_path.write_bytes(face_bytes)
+        retention_manager.track(face_path)
+    
+    job_manager.create(job_id, "pipeline")
+    if face_path:
+        retention_manager.reference(job_id, face_path)
+    
+    brief = {
+        "prompt": prompt,
+        "product_description": product_description,
+        "character_description": character_description,
+        "face_path": str(face_path) if face_path else None,
+        "voiceover_script": voiceover_script,
+        "language": language,
+        "subtitle_text": subtitle_text,
+        "font_size": font_size,
+        "font_color": font_color,
+        "aspect_ratio": aspect_ratio,
+        "duration_seconds": duration_seconds,
+    }
+    
+    admission_controller.submit(
+        settings.veo_model,
+        _generate_pipeline_task,
+        job_id, brief,
+        priority=priority
+    )
+    
+    return JobStatus(
+        job_id=job_id,
+        status="pending",
+        progress=0,
+        message="Pipeline started"
+    )
+
+
+@task_queue.task("io")
+async def _generate_pipeline_task(job_id: str, brief: dict[str, Any]):
+    """Background task to run every stage of a pipeline job."""
+    try:
+        stages = _build_stages(job_id, brief)
+        final_stage = stages[-1].name
+        
+        job_manager.update(job_id, status="processing", message="Running pipeline...")
+        artifacts = await Pipeline(job_id, stages).run()
+        
+        result_urls = {
+            name: f"/api/v1/download/{Path(path).name}"
+            for name, path in artifacts.items()
+            if Path(path).parent == settings.output_dir
+        }
+        result_urls.update(await job_executor.pools["cpu"].run(
+            preview_generator.generate, job_id, Path(artifacts[final_stage])
+        ))
+        job_manager.complete(
+            job_id,
+            result_urls[final_stage],
+            "Pipeline completed successfully",
+            result_urls=result_urls
+        )
+        hls_packager.schedule(job_id, Path(artifacts[final_stage]))
+    
+    except Exception as e:
+        job_manager.fail(job_id, str(e))
+
+
+def _build_stages(job_id: str, brief: dict[str, Any]) -> list[Stage]:
+    """Stages needed for a brief; the last one produces the final video."""
+    output_dir = settings.output_dir
+    
+    async def character(artifacts: dict[str, Any], report: Callable) -> Path:
+        if brief["face_path"]:
+            report(100, "Using provided character image")
+            return Path(brief["face_path"])
+        
+        face_path = await CharacterGenerator().generate_face_async(
+            brief["character_description"], output_dir / f"{job_id}_face.jpg"
+        )
+        if not face_path:
+            raise Exception("Failed to generate face reference image")
+        retention_manager.track(face_path)
+        return face_path
+    
+    async def video(artifacts: dict[str, Any], report: Callable) -> Path:
+        generator = VideoGenerator()
+        operation = await generator.start_async(
+            f"{brief['prompt']}\n\nShowing: {brief['product_description']}",
+            image_path=artifacts["character"],
+            aspect_ratio=brief["aspect_ratio"],
+            duration_seconds=brief["duration_seconds"]
+        )
+        report(10, "Generating video (30-90 seconds)...")
+        
+        max_wait = 120
+        operation = await generator.wait_async(
+            operation,
+            timeout=max_wait,
+            on_poll=lambda elapsed: report(min(10 + int(elapsed / max_wait * 80), 90))
+        )
+        
+        report(90, "Downloading video...")
+        video_path = output_dir / f"{job_id}_video.mp4"
+        await generator.download_async(operation, video_path)
+        retention_manager.track(video_path)
+        return video_path
+    
+    async def voiceover(artifacts: dict[str, Any], report: Callable) -> Path:
+        audio_path = await asyncio.to_thread(
+            AudioGenerator().generate_voiceover,
+            brief["voiceover_script"],
+            output_dir / f"{job_id}_voiceover.mp3",
+            brief["language"]
+        )
+        if not audio_path:
+            raise Exception("Failed to generate voiceover")
+        retention_manager.track(audio_path)
+        return audio_path
+    
+    async def compose(artifacts: dict[str, Any], report: Callable) -> Path:
+        composition = Composition([Clip(artifacts["video"])], clip_audio=not brief["voiceover_script"])
+        if brief["voiceover_script"]:
+            composition.audio.append(AudioTrack(artifacts["voiceover"]))
+        if brief["subtitle_text"]:
+            subtitle_path = settings.temp_dir / f"{job_id}_subtitles.srt"
+            create_srt_file(subtitle_path, brief["subtitle_text"], media_probe.duration(artifacts["video"]))
+            composition.subtitles = Subtitles(subtitle_path, brief["font_size"], brief["font_color"])
+        
+        final_path = await job_executor.pools["cpu"].run(
+            VideoComposer().render,
+            composition,
+            output_dir / f"{job_id}_final.mp4",
+            lambda done: report(int(done * 100))
+        )
+        if not final_path:
+            raise Exception("Failed to compose the final video")
+        retention_manager.track(final_path)
+        return final_path
+    
+    stages = [
+        Stage("character", character),
+        Stage("video", video, depends_on=["character"], weight=6),
+    ]
+    if brief["voiceover_script"]:
+        stages.append(Stage("voiceover", voiceover))
+    if brief["voiceover_script"] or brief["subtitle_text"]:
+        # Voiceover and subtitles are added in one encode
+        stages.append(Stage("compose", compose, depends_on=[stage.name for stage in stages[1:]]))
+    return stages
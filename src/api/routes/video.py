@@ -1,16 +1,27 @@
 """Video generation routes."""
+import asyncio
+import json
 import uuid
-import time
+from functools import partial
 from pathlib import Path
-from fastapi import APIRouter, BackgroundTasks, Form, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
-import requests
-from google import genai
-from google.genai import types
+from typing import Callable, Optional
+from fastapi import APIRouter, Form, File, UploadFile, Header, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 
-from src.core import settings
+from src.core import VideoComposer, VideoGenerator, media_probe, settings
+from src.core.composer import RENDITIONS, Clip, Composition, Subtitles
 from src.api.schemas import JobStatus
-from src.api.jobs import job_manager
+from src.api.jobs import job_executor, job_manager
+from src.api.job_store import TERMINAL_STATUSES
+from src.api.cache import GenerationCache, generation_cache
+from src.api.admission import admission_controller
+from src.api.checkpoints import checkpoint_store
+from src.api.hls import hls_packager
+from src.api.previews import preview_generator
+from src.api.renditions import RenditionError, rendition_cache
+from src.api.retention import retention_manager
+from src.api.routes.helpers import check_admission, create_srt_file, read_character_image, to_job_status
+from src.api.task_queue import task_queue
 from src.integrations.airtable import get_airtable_manager
 
 router = APIRouter(prefix="/api/v1", tags=["Video"])
@@ -18,14 +29,15 @@ router = APIRouter(prefix="/api/v1", tags=["Video"])
 
 @router.post("/video/generate", response_model=JobStatus)
 async def generate_video(
-    background_tasks: BackgroundTasks,
     prompt: str = Form(...),
     product_description: str = Form(...),
     character_face: UploadFile = File(None),
     character_job_id: str = Form(None),
     character_image_type: str = Form("face"),
     aspect_ratio: str = Form("9:16"),
-    duration_seconds: int = Form(8)
+    duration_seconds: int = Form(8),
+    priority: str = Form("interactive"),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
     Generate influencer video.
@@ -37,64 +49,242 @@ async def generate_video(
     - **character_image_type**: Which image to use from character job (face, body, side) - default: face
     - **aspect_ratio**: Video aspect ratio (default: 9:16)
     - **duration_seconds**: Video duration (default: 8, max: 8)
+    - **priority**: Queue priority, interactive or batch (default: interactive)
+    
+    Responds 429 with Retry-After when the generation queue is full.
+    Identical requests reuse the finished (or still running) job, and an
+    `Idempotency-Key` header replays the job created by the first request.
     
     Returns job_id to track progress.
     """
     job_id = str(uuid.uuid4())
     
-    # Determine which image to use
-    if character_job_id:
-        # Use image from previous character generation
-        face_path = settings.output_dir / f"{character_job_id}_{character_image_type}.jpg"
-        if not face_path.exists():
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Character image not found for job {character_job_id}"
-            )
-    elif character_face:
+    face_path, face_bytes = await read_character_image(
+        job_id, character_face, character_job_id, character_image_type
+    )
+    
+    cache_key = GenerationCache.make_key(
+        "video",
+        prompt=prompt,
+        product_description=product_description,
+        image=face_bytes,
+        aspect_ratio=aspect_ratio,
+        duration_seconds=duration_seconds,
+        model=settings.veo_model
+    )
+    existing_job_id = generation_cache.resolve(cache_key, idempotency_key)
+    if existing_job_id:
+        return await get_job_status(existing_job_id)
+    
+    check_admission(priority)
+    
+    if not character_job_id:
         # Save uploaded image
-        face_path = settings.temp_dir / f"{job_id}_face.jpg"
         face_path.parent.mkdir(parents=True, exist_ok=True)
-        face_path.write_bytes(await character_face.read())
-    else:
+        face_path.write_bytes(face_bytes)
+        retention_manager.track(face_path)
+    
+    job_manager.create(job_id, "video")
+    retention_manager.reference(job_id, face_path)
+    generation_cache.begin(cache_key, job_id, idempotency_key)
+    
+    admission_controller.submit(
+        settings.veo_model,
+        _generate_video_task,
+        job_id, prompt, product_description, face_path, aspect_ratio, duration_seconds, cache_key,
+        priority=priority
+    )
+    
+    return JobStatus(
+        job_id=job_id,
+        status="pending",
+        progress=0,
+        message="Video generation started"
+    )
+
+
+@router.post("/video/generate-long", response_model=JobStatus)
+async def generate_long_video(
+    scenes: str = Form(...),
+    product_description: str = Form(...),
+    character_face: UploadFile = File(None),
+    character_job_id: str = Form(None),
+    character_image_type: str = Form("face"),
+    aspect_ratio: str = Form("9:16"),
+    duration_seconds: int = Form(8),
+    priority: str = Form("interactive"),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Generate a long-form video from several scenes.
+    
+    Every scene is rendered as its own Veo segment (several in parallel)
+    and the segments are stitched into a single video.
+    
+    - **scenes**: JSON array of scene prompts, in playback order
+    - **product_description**: Product/content description
+    - **character_face**: Character face reference image (upload) - optional if character_job_id provided
+    - **character_job_id**: Job ID from character generation - optional if character_face provided
+    - **character_image_type**: Which image to use from character job (face, body, side) - default: face
+    - **aspect_ratio**: Video aspect ratio (default: 9:16)
+    - **duration_seconds**: Duration of each segment (default: 8, max: 8)
+    - **priority**: Queue priority, interactive or batch (default: interactive)
+    
+    Returns job_id to track progress.
+    """
+    try:
+        scene_list = json.loads(scenes)
+    except json.JSONDecodeError:
+        scene_list = None
+    
+    if not isinstance(scene_list, list) or not all(isinstance(scene, str) and scene.strip() for scene in scene_list):
+        raise HTTPException(status_code=400, detail="scenes must be a JSON array of non-empty strings")
+    
+    if not 1 <= len(scene_list) <= settings.longform_max_scenes:
         raise HTTPException(
             status_code=400,
-            detail="Either character_face or character_job_id must be provided"
+            detail=f"scenes must contain between 1 and {settings.longform_max_scenes} entries"
         )
     
-    job_manager.create(job_id)
+    job_id = str(uuid.uuid4())
     
-    background_tasks.add_task(
-        _generate_video_task,
-        job_id, prompt, product_description, face_path, aspect_ratio, duration_seconds
+    face_path, face_bytes = await read_character_image(
+        job_id, character_face, character_job_id, character_image_type
+    )
+    
+    cache_key = GenerationCache.make_key(
+        "long_video",
+        scenes=[" ".join(scene.split()) for scene in scene_list],
+        product_description=product_description,
+        image=face_bytes,
+        aspect_ratio=aspect_ratio,
+        duration_seconds=duration_seconds,
+        model=settings.veo_model
+    )
+    existing_job_id = generation_cache.resolve(cache_key, idempotency_key)
+    if existing_job_id:
+        return await get_job_status(existing_job_id)
+    
+    check_admission(priority)
+    
+    if not character_job_id:
+        # Save uploaded image
+        face_path.parent.mkdir(parents=True, exist_ok=True)
+        face_path.write_bytes(face_bytes)
+        retention_manager.track(face_path)
+    
+    job_manager.create(job_id, "long_video")
+    retention_manager.reference(job_id, face_path)
+    generation_cache.begin(cache_key, job_id, idempotency_key)
+    
+    admission_controller.submit(
+        settings.veo_model,
+        _generate_long_video_task,
+        job_id, scene_list, product_description, face_path, aspect_ratio, duration_seconds, cache_key,
+        priority=priority,
+        cost=len(scene_list)
     )
     
     return JobStatus(
         job_id=job_id,
         status="pending",
         progress=0,
-        message="Video generation started"
+        message=f"Long-form generation started ({len(scene_list)} scenes)"
     )
 
 
 @router.get("/job/{job_id}", response_model=JobStatus)
-async def get_job_status(job_id: str):
-    """Get job status."""
-    job = job_manager.get(job_id)
+async def get_job_status(job_id: str, wait: float = 0, version: Optional[int] = None):
+    """
+    Get job status.
+    
+    - **wait**: Long-poll for up to this many seconds until the job changes
+    - **version**: Version the client already has; returns immediately if the job is newer
+    """
+    if wait > 0:
+        job = await job_manager.wait_for_change(job_id, version, timeout=min(wait, settings.job_wait_max))
+    else:
+        job = job_manager.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return JobStatus(
-        job_id=job_id,
-        status=job.status,
-        progress=job.progress,
-        message=job.message,
-        result_url=job.result_url,
-        result_urls=job.result_urls,
-        error=job.error
+    return to_job_status(job_id, job)
+
+
+@router.get("/job/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Stream job updates as Server-Sent Events.
+    
+    Sends the current state, then one `status` event per update until the
+    job completes or fails.
+    """
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        queue = job_manager.subscribe(job_id)
+        try:
+            job = job_manager.get(job_id)
+            while True:
+                data = to_job_status(job_id, job).model_dump_json()
+                yield f"id: {job.version}\nevent: status\ndata: {data}\n\n"
+                if job.status in TERMINAL_STATUSES:
+                    return
+                
+                while True:
+                    changed = await job_manager.next_change(
+                        job_id, queue, job.version, settings.job_events_keepalive
+                    )
+                    if changed:
+                        job = changed
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            job_manager.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+@router.delete("/job/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """
+    Cancel a job.
+    
+    Stops the job wherever it is: waiting for admission, polling Veo or
+    encoding (its ffmpeg processes are killed). Partial files are deleted
+    and the job ends as `cancelled`, which is not counted as a failure.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    
+    job = job_manager.cancel(job_id)
+    admission_controller.cancel(job_id)
+    if settings.execution_mode == "queue":
+        await asyncio.to_thread(task_queue.cancel, job_id)
+    await job_executor.cancel(job_id)
+    
+    await asyncio.to_thread(_cleanup_cancelled_job, job_id)
+    return to_job_status(job_id, job)
+
+
+def _cleanup_cancelled_job(job_id: str):
+    """Delete the checkpoint and partial files of a cancelled job."""
+    checkpoint_store.remove(job_id)
+    generation_cache.abandon_job(job_id)
+    
+    for directory in (settings.temp_dir, settings.output_dir):
+        for path in directory.glob(f"{job_id}_*"):
+            path.unlink(missing_ok=True)
+
+
 @router.get("/download/{filename}")
 async def download_file(filename: str):
     """Download generated file."""
@@ -103,6 +293,8 @@ async def download_file(filename: str):
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     
+    retention_manager.touch(file_path)
+    
     return FileResponse(
         str(file_path),
         media_type="application/octet-stream",
@@ -110,9 +302,112 @@ async def download_file(filename: str):
     )
 
 
+@router.get("/hls/{filename}")
+async def stream_hls(filename: str):
+    """Serve an HLS playlist or segment of a packaged video."""
+    if filename.endswith(".m3u8"):
+        # Playlists are VOD but replaced if a video is packaged again
+        media_type, cache_control = "application/vnd.apple.mpegurl", "public, max-age=60"
+    elif filename.endswith(".ts"):
+        # Segment names are never reused for different content within a playlist
+        media_type, cache_control = "video/mp2t", "public, max-age=86400"
+    else:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    file_path = settings.output_dir / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    retention_manager.touch(file_path)
+    
+    return FileResponse(
+        str(file_path),
+        media_type=media_type,
+        headers={"Cache-Control": cache_control}
+    )
+
+
+@router.post("/video/{job_id}/previews")
+async def regenerate_previews(job_id: str):
+    """
+    Create the poster, animated preview and contact sheet of a video again.
+    
+    For videos made before previews existed, or whose previews were
+    removed. The URLs are also added to the job's result_urls.
+    """
+    video_path = rendition_cache.source(job_id)
+    if video_path is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    urls = await job_executor.pools["cpu"].run(preview_generator.generate, job_id, video_path, True)
+    if not urls:
+        raise HTTPException(status_code=500, detail="Failed to render previews")
+    
+    preview_generator.publish(job_id, urls)
+    return urls
+
+
+@router.get("/video/{job_id}/renditions")
+async def list_renditions(job_id: str):
+    """List the rendition presets of a video and which are already rendered."""
+    if rendition_cache.source(job_id) is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    return {
+        name: {
+            "width": rendition.width,
+            "height": rendition.height,
+            "video_kbps": rendition.video_kbps,
+            "ready": rendition_cache.is_fresh(job_id, name),
+            "url": f"/api/v1/video/{job_id}/renditions/{name}",
+        }
+        for name, rendition in RENDITIONS.items()
+    }
+
+
+@router.post("/video/{job_id}/renditions")
+async def render_renditions(job_id: str, names: str = Form(...)):
+    """
+    Render several renditions of a video together.
+    
+    - **names**: Comma-separated rendition names (high, mobile, square)
+    
+    Missing renditions are rendered in one pass over the source. Returns
+    the download URL of each rendition once all are ready.
+    """
+    requested = [name.strip() for name in names.split(",") if name.strip()]
+    paths = await _ensure_renditions(job_id, requested)
+    return {name: f"/api/v1/download/{path.name}" for name, path in paths.items()}
+
+
+@router.get("/video/{job_id}/renditions/{name}")
+async def download_rendition(job_id: str, name: str):
+    """Download a rendition of a video, rendering it on first request."""
+    path = (await _ensure_renditions(job_id, [name]))[name]
+    
+    return FileResponse(
+        str(path),
+        media_type="video/mp4",
+        filename=path.name
+    )
+
+
+async def _ensure_renditions(job_id: str, names: list[str]) -> dict[str, Path]:
+    """Render missing renditions off the event loop, mapping errors to HTTP errors."""
+    if not names:
+        raise HTTPException(status_code=400, detail="No rendition requested")
+    try:
+        return await job_executor.pools["cpu"].run(rendition_cache.ensure, job_id, names)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Video not found")
+    except RenditionError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/video/add-subtitles", response_model=JobStatus)
 async def add_subtitles_to_video(
-    background_tasks: BackgroundTasks,
     video_job_id: str = Form(...),
     subtitle_text: str = Form(...),
     subtitle_language: str = Form("en"),
@@ -131,9 +426,11 @@ async def add_subtitles_to_video(
     Returns job_id to track progress.
     """
     job_id = str(uuid.uuid4())
-    job_manager.create(job_id)
+    job_manager.create(job_id, "subtitles")
+    retention_manager.reference(job_id, settings.output_dir / f"{video_job_id}_video.mp4")
     
-    background_tasks.add_task(
+    job_executor.submit(
+        "cpu",
         _add_subtitles_task,
         job_id, video_job_id, subtitle_text, subtitle_language, font_size, font_color
     )
@@ -146,97 +443,287 @@ async def add_subtitles_to_video(
     )
 
 
-def _generate_video_task(
+@task_queue.task("io")
+async def _generate_video_task(
     job_id: str,
     prompt: str,
     product_description: str,
     face_path: Path,
     aspect_ratio: str,
-    duration_seconds: int
+    duration_seconds: int,
+    cache_key: Optional[str] = None
 ):
     """Background task to generate video."""
     airtable = get_airtable_manager()
     airtable_record_id = None
+    face_path = Path(face_path)
+    
+    checkpoint = checkpoint_store.start(job_id, "video", {
+        "prompt": prompt,
+        "product_description": product_description,
+        "face_path": str(face_path),
+        "aspect_ratio": aspect_ratio,
+        "duration_seconds": duration_seconds,
+        "cache_key": cache_key,
+    })
     
     try:
         job_manager.update(job_id, status="processing", progress=10, message="Preparing video generation...")
         
-        client = genai.Client(api_key=settings.gemini_api_key)
-        
-        image = types.Image(
-            image_bytes=face_path.read_bytes(),
-            mime_type="image/jpeg"
-        )
+        generator = VideoGenerator()
         
         full_prompt = f"{prompt}\n\nShowing: {product_description}"
         
-        job_manager.update(job_id, progress=20, message="Sending request to Veo3...")
-        
-        operation = client.models.generate_videos(
-            model=settings.veo_model,
-            prompt=full_prompt,
-            image=image,
-            config=types.GenerateVideosConfig(
+        started = checkpoint["operations"].get("0")
+        if started:
+            # Google kept generating while we were down: re-attach instead of paying twice
+            operation = generator.attach(started["name"], started["key_id"])
+        else:
+            job_manager.update(job_id, progress=20, message="Sending request to Veo3...")
+            
+            operation = await generator.start_async(
+                full_prompt,
+                image_path=face_path,
                 aspect_ratio=aspect_ratio,
                 duration_seconds=duration_seconds
             )
-        )
+            checkpoint_store.record_operation(
+                job_id, "0", operation.name, generator.client_for(operation).key_id
+            )
         
         job_manager.update(job_id, progress=30, message="Generating video (30-90 seconds)...")
         
         max_wait = 120
-        elapsed = 0
         
-        while not operation.done and elapsed < max_wait:
-            time.sleep(5)
-            elapsed += 5
-            operation = client.operations.get(operation)
+        def on_poll(elapsed: int):
             progress = 30 + int((elapsed / max_wait) * 60)
             job_manager.update(job_id, progress=min(progress, 90))
         
-        if not operation.done:
-            raise Exception("Video generation timeout")
+        operation = await generator.wait_async(operation, timeout=max_wait, on_poll=on_poll)
         
         job_manager.update(job_id, progress=90, message="Downloading video...")
+        checkpoint_store.set_stage(job_id, "downloading")
         
-        for video in operation.response.generated_videos:
-            headers = {"x-goog-api-key": settings.gemini_api_key}
-            response = requests.get(video.video.uri, headers=headers)
-            
-            if response.status_code == 200:
-                output_path = settings.output_dir / f"{job_id}_video.mp4"
-                output_path.write_bytes(response.content)
-                
-                job_manager.complete(job_id, f"/api/v1/download/{job_id}_video.mp4", "Video generated successfully")
-                
-                if airtable:
-                    try:
-                        airtable_record_id = airtable.create_video_record(
-                            job_id=job_id,
-                            prompt=prompt,
-                            product_description=product_description,
-                            video_path=str(output_path),
-                            character_face_path=str(face_path),
-                            aspect_ratio=aspect_ratio,
-                            duration_seconds=duration_seconds,
-                            metadata={"full_prompt": full_prompt}
-                        )
-                    except Exception as e:
-                        print(f"Airtable save failed: {e}")
-            else:
-                raise Exception(f"Download failed: HTTP {response.status_code}")
-                
+        output_path = settings.output_dir / f"{job_id}_video.mp4"
+        await generator.download_async(operation, output_path)
+        retention_manager.track(output_path)
+        
+        previews = await job_executor.pools["cpu"].run(preview_generator.generate, job_id, output_path)
+        
+        result_url = f"/api/v1/download/{job_id}_video.mp4"
+        job_manager.complete(job_id, result_url, "Video generated successfully", result_urls=previews or None)
+        checkpoint_store.remove(job_id)
+        hls_packager.schedule(job_id, output_path)
+        
+        if cache_key:
+            generation_cache.finish(cache_key, job_id, result_url, [output_path], result_urls=previews or None)
+        
+        if airtable:
+            try:
+                airtable_record_id = await asyncio.to_thread(
+                    airtable.create_video_record,
+                    job_id=job_id,
+                    prompt=prompt,
+                    product_description=product_description,
+                    video_path=str(output_path),
+                    character_face_path=str(face_path),
+                    aspect_ratio=aspect_ratio,
+                    duration_seconds=duration_seconds,
+                    metadata={"full_prompt": full_prompt}
+                )
+            except Exception as e:
+                print(f"Airtable save failed: {e}")
+    
     except Exception as e:
         job_manager.fail(job_id, str(e))
+        checkpoint_store.remove(job_id)
+        
+        if cache_key:
+            generation_cache.abandon(cache_key)
         
         if airtable and airtable_record_id:
             try:
-                airtable.update_record_status(airtable_record_id, "Failed", str(e))
+                await asyncio.to_thread(airtable.update_record_status, airtable_record_id, "Failed", str(e))
             except:
                 pass
 
 
 
+@task_queue.task("io")
+async def _generate_long_video_task(
+    job_id: str,
+    scenes: list[str],
+    product_description: str,
+    face_path: Path,
+    aspect_ratio: str,
+    duration_seconds: int,
+    cache_key: Optional[str] = None
+):
+    """Background task to render scenes in parallel and stitch them."""
+    airtable = get_airtable_manager()
+    face_path = Path(face_path)
+    segment_paths = [settings.temp_dir / f"{job_id}_segment_{i}.mp4" for i in range(len(scenes))]
+    
+    checkpoint = checkpoint_store.start(job_id, "long_video", {
+        "scenes": scenes,
+        "product_description": product_description,
+        "face_path": str(face_path),
+        "aspect_ratio": aspect_ratio,
+        "duration_seconds": duration_seconds,
+        "cache_key": cache_key,
+    })
+    
+    try:
+        job_manager.update(
+            job_id,
+            status="processing",
+            progress=10,
+            message=f"Generating {len(scenes)} segments..."
+        )
+        
+        generator = VideoGenerator()
+        semaphore = asyncio.Semaphore(settings.longform_max_parallel_segments)
+        finished = 0
+        
+        async def render_segment(index: int, scene: str):
+            nonlocal finished
+            segment = str(index)
+            
+            if segment in checkpoint["completed_segments"] and segment_paths[index].exists():
+                finished += 1
+                return
+            
+            async with semaphore:
+                started = checkpoint["operations"].get(segment)
+                if started:
+                    operation = generator.attach(started["name"], started["key_id"])
+                else:
+                    operation = await generator.start_async(
+                        f"{scene}\n\nShowing: {product_description}",
+                        image_path=face_path,
+                        aspect_ratio=aspect_ratio,
+                        duration_seconds=duration_seconds
+                    )
+                    checkpoint_store.record_operation(
+                        job_id, segment, operation.name, generator.client_for(operation).key_id
+                    )
+                
+                operation = await generator.wait_async(operation, timeout=120)
+                await generator.download_async(operation, segment_paths[index])
+                checkpoint_store.complete_segment(job_id, segment)
+            
+            finished += 1
+            job_manager.update(
+                job_id,
+                progress=10 + int(75 * finished / len(scenes)),
+                message=f"Generated {finished}/{len(scenes)} segments..."
+            )
+        
+        tasks = [asyncio.ensure_future(render_segment(i, scene)) for i, scene in enumerate(scenes)]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            # One failed segment fails the job: stop the rest
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        job_manager.update(job_id, progress=85, message=f"Stitching {len(scenes)} segments...")
+        checkpoint_store.set_stage(job_id, "stitching")
+        
+        output_path = settings.output_dir / f"{job_id}_video.mp4"
+        result = await job_executor.pools["cpu"].run(
+            VideoComposer().concatenate_many,
+            segment_paths,
+            output_path,
+            None,
+            lambda done: job_manager.update(job_id, progress=85 + int(done * 14))
+        )
+        if not result:
+            raise Exception("Failed to stitch segments")
+        retention_manager.track(output_path)
+        previews = await job_executor.pools["cpu"].run(preview_generator.generate, job_id, output_path)
+        
+        result_url = f"/api/v1/download/{job_id}_video.mp4"
+        job_manager.complete(
+            job_id,
+            result_url,
+            f"Long-form video generated ({len(scenes)} scenes)",
+            result_urls=previews or None
+        )
+        checkpoint_store.remove(job_id)
+        hls_packager.schedule(job_id, output_path)
+        
+        if cache_key:
+            generation_cache.finish(cache_key, job_id, result_url, [output_path], result_urls=previews or None)
+        
+        if airtable:
+            try:
+                await asyncio.to_thread(
+                    airtable.create_video_record,
+                    job_id=job_id,
+                    prompt="\n\n".join(scenes),
+                    product_description=product_description,
+                    video_path=str(output_path),
+                    character_face_path=str(face_path),
+                    aspect_ratio=aspect_ratio,
+                    duration_seconds=duration_seconds * len(scenes),
+                    metadata={"scenes": len(scenes)}
+                )
+            except Exception as e:
+                print(f"Airtable save failed: {e}")
+    
+    except Exception as e:
+        job_manager.fail(job_id, str(e))
+        checkpoint_store.remove(job_id)
+        
+        if cache_key:
+            generation_cache.abandon(cache_key)
+    
+    # Segments are kept while a checkpoint still references them
+    if not checkpoint_store.get(job_id):
+        for segment_path in segment_paths:
+            segment_path.unlink(missing_ok=True)
+
+
+def resume_interrupted_jobs() -> int:
+    """
+    Re-attach video jobs interrupted by a restart.
+    
+    Jobs that already submitted their Veo operation resume polling and
+    download the result; jobs that had not yet reached Veo start over.
+    
+    Returns:
+        Number of resumed jobs
+    """
+    tasks = {
+        "video": _generate_video_task,
+        "long_video": _generate_long_video_task,
+    }
+    
+    resumed = 0
+    for checkpoint in checkpoint_store.pending():
+        task = tasks.get(checkpoint["kind"])
+        if task is None:
+            continue
+        
+        job_id = checkpoint["job_id"]
+        params = checkpoint["params"]
+        
+        if not job_manager.get(job_id):
+            job_manager.create(job_id, checkpoint["kind"])
+        job_manager.update(job_id, status="processing", message="Resuming after restart...")
+        
+        if params.get("cache_key"):
+            generation_cache.begin(params["cache_key"], job_id)
+        
+        job_executor.submit("io", partial(task, job_id, **params))
+        resumed += 1
+    
+    return resumed
+
+
+@task_queue.task("cpu")
 def _add_subtitles_task(
     job_id: str,
     video_job_id: str,
@@ -246,8 +733,6 @@ def _add_subtitles_task(
     font_color: str
 ):
     """Background task to add subtitles to video."""
-    import subprocess
-    
     airtable = get_airtable_manager()
     airtable_record_id = None
     
@@ -264,7 +749,7 @@ def _add_subtitles_task(
         
         # Create SRT subtitle file
         job_manager.update(job_id, progress=20, message="Creating subtitle file...")
-        _create_srt_file(subtitle_path, subtitle_text)
+        create_srt_file(subtitle_path, subtitle_text, media_probe.duration(video_path))
         
         # Add subtitles using FFmpeg
         job_manager.update(job_id, progress=50, message="Adding subtitles with FFmpeg...")
@@ -273,14 +758,20 @@ def _add_subtitles_task(
             str(subtitle_path), 
             str(output_path),
             font_size,
-            font_color
+            font_color,
+            on_progress=lambda done: job_manager.update(job_id, progress=50 + int(done * 45))
         )
+        retention_manager.track(subtitle_path)
+        retention_manager.track(output_path)
+        previews = preview_generator.generate(job_id, output_path)
         
         job_manager.complete(
             job_id,
             f"/api/v1/download/{job_id}_video_with_subtitles.mp4",
-            "Subtitles added successfully"
+            "Subtitles added successfully",
+            result_urls=previews or None
         )
+        hls_packager.schedule(job_id, output_path)
         
         if airtable:
             try:
@@ -300,7 +791,7 @@ def _add_subtitles_task(
                 )
             except Exception as e:
                 print(f"Airtable save failed: {e}")
-        
+    
     except Exception as e:
         job_manager.fail(job_id, str(e))
         
@@ -311,55 +802,20 @@ def _add_subtitles_task(
                 pass
 
 
-def _create_srt_file(output_path: Path, subtitle_text: str):
-    """Create SRT subtitle file."""
-    # Simple SRT format: one subtitle for the entire video duration
-    srt_content = f"""1
-00:00:00,000 --> 00:00:08,000
-{subtitle_text}
-"""
-    
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(srt_content, encoding='utf-8')
-
-
 def _add_subtitles_with_ffmpeg(
     video_path: str, 
     subtitle_path: str, 
     output_path: str,
     font_size: int = 24,
-    font_color: str = "white"
+    font_color: str = "white",
+    on_progress: Optional[Callable[[float], None]] = None
 ):
     """Add subtitles to video using FFmpeg."""
-    import subprocess
-    
-    # Map color names to hex values for FFmpeg
-    color_map = {
-        "white": "&H00FFFFFF&",
-        "yellow": "&H0000FFFF&",
-        "red": "&H000000FF&",
-        "green": "&H0000FF00&",
-        "blue": "&H00FF0000&",
-        "black": "&H00000000&"
-    }
-    
-    color_hex = color_map.get(font_color.lower(), "&H00FFFFFF&")
-    
-    # Escape the subtitle path for Windows
-    subtitle_path_escaped = subtitle_path.replace('\\', '\\\\').replace(':', '\\:')
-    
-    cmd = [
-        'ffmpeg',
-        '-i', video_path,
-        '-vf', f"subtitles={subtitle_path_escaped}:force_style='FontSize={font_size},PrimaryColour={color_hex},Alignment=2'",
-        '-c:a', 'copy',
-        '-c:v', 'libx264',
-        '-preset', 'medium',
-        '-y',  # Overwrite output file if exists
-        output_path
-    ]
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    composition = Composition(
+        [Clip(Path(video_path))],
+        clip_audio=True,
+        subtitles=Subtitles(Path(subtitle_path), font_size, font_color)
+    )
     
-    if result.returncode != 0:
-        raise Exception(f"FFmpeg error: {result.stderr}")
+    if not VideoComposer().render(composition, Path(output_path), on_progress):
+        raise Exception("FFmpeg error: failed to burn subtitles")
@@ -1,17 +1,18 @@
 """Voiceover generation routes."""
 import uuid
-from fastapi import APIRouter, BackgroundTasks, Form
+from fastapi import APIRouter, Form
 
 from src.core import AudioGenerator, settings
 from src.api.schemas import JobStatus
-from src.api.jobs import job_manager
+from src.api.jobs import job_executor, job_manager
+from src.api.retention import retention_manager
+from src.api.task_queue import task_queue
 
 router = APIRouter(prefix="/api/v1/voiceover", tags=["Voiceover"])
 
 
 @router.post("/generate", response_model=JobStatus)
 async def generate_voiceover(
-    background_tasks: BackgroundTasks,
     script: str = Form(...),
     language: str = Form("en")
 ):
@@ -24,9 +25,9 @@ async def generate_voiceover(
     Returns job_id to track progress.
     """
     job_id = str(uuid.uuid4())
-    job_manager.create(job_id)
+    job_manager.create(job_id, "voiceover")
     
-    background_tasks.add_task(_generate_voiceover_task, job_id, script, language)
+    job_executor.submit("io", _generate_voiceover_task, job_id, script, language)
     
     return JobStatus(
         job_id=job_id,
@@ -36,6 +37,7 @@ async def generate_voiceover(
     )
 
 
+@task_queue.task("io")
 def _generate_voiceover_task(job_id: str, script: str, language: str):
     """Background task to generate voiceover."""
     try:
@@ -47,6 +49,7 @@ def _generate_voiceover_task(job_id: str, script: str, language: str):
         result = generator.generate_voiceover(script, output_path, language)
         
         if result:
+            retention_manager.track(result)
             job_manager.complete(job_id, f"/api/v1/download/{job_id}_voiceover.mp3", "Voiceover generated successfully")
         else:
             raise Exception("Failed to generate voiceover")
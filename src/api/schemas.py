@@ -49,15 +49,43 @@ class VoiceoverRequest(BaseModel):
     )
 
 
+class StageStatus(BaseModel):
+    """Status of one stage of a pipeline job."""
+    status: str  # pending, processing, completed, failed, cancelled
+    progress: int = Field(default=0, ge=0, le=100)
+    message: Optional[str] = None
+
+
 class JobStatus(BaseModel):
     """Job status response."""
     job_id: str
-    status: str  # pending, processing, completed, failed
+    status: str  # pending, processing, completed, failed, cancelled
     progress: int = Field(ge=0, le=100)
     message: str
     result_url: Optional[str] = None
     result_urls: Optional[dict[str, str]] = None  # For multiple results (e.g., character images)
     error: Optional[str] = None
+    version: int = 0  # Incremented on every update; pass back as ?version= when long-polling
+    job_type: Optional[str] = None  # character, video, long_video, subtitles, voiceover
+    created_at: Optional[float] = None
+    stages: Optional[dict[str, StageStatus]] = None  # Pipeline jobs only
+
+
+class BulkJobStatusRequest(BaseModel):
+    """Request for the status of several jobs."""
+    job_ids: list[str] = Field(..., min_length=1, max_length=500)
+
+
+class BulkJobStatusResponse(BaseModel):
+    """Statuses of several jobs."""
+    jobs: list[JobStatus]
+    missing: list[str] = []
+
+
+class JobListResponse(BaseModel):
+    """One page of a job listing."""
+    jobs: list[JobStatus]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
 
 
 class HealthResponse(BaseModel):
@@ -65,4 +93,6 @@ class HealthResponse(BaseModel):
     status: str
     api_key_configured: bool
     airtable_enabled: bool
+    queue_depth: int = 0
+    estimated_wait_seconds: float = 0.0
     timestamp: float
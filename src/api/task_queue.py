@@ -0,0 +1,268 @@
+"""Durable SQLite task queue for running job tasks in worker processes."""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from src.core.config import settings
+
+
+@dataclass
+class LeasedTask:
+    """A task leased by a worker."""
+    task_id: int
+    name: str
+    pool: str
+    job_id: str
+    args: list
+    kwargs: dict[str, Any]
+    attempts: int
+
+
+class TaskQueue:
+    """
+    Local durable queue shared by the API and worker processes.
+    
+    Workers lease tasks for task_lease_seconds and extend the lease with
+    heartbeats while running them. A task whose lease expires (its worker
+    died) is delivered again, up to task_max_attempts times; after that
+    it is marked dead so the job can be failed.
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or settings.task_queue_path
+        self._registry: dict[str, tuple[Callable, str]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def task(self, pool: str) -> Callable:
+        """Register a job task so workers can run it by name."""
+        def register(fn: Callable) -> Callable:
+            self._registry[self.task_name(fn)] = (fn, pool)
+            return fn
+        return register
+    
+    @staticmethod
+    def task_name(fn: Callable) -> str:
+        """Name a task is stored under."""
+        return f"{fn.__module__}.{fn.__name__}"
+    
+    def is_registered(self, fn: Callable) -> bool:
+        """Whether a function can be run by workers."""
+        return self.task_name(fn) in self._registry
+    
+    def resolve(self, name: str) -> tuple[Callable, str]:
+        """Task function and pool for a registered name."""
+        return self._registry[name]
+    
+    def enqueue(self, fn: Callable, args: tuple = (), kwargs: Optional[dict[str, Any]] = None) -> int:
+        """
+        Add a task to the queue.
+        
+        Args:
+            fn: Registered task function; job tasks take the job ID first
+            args: Positional arguments (JSON serializable, paths become strings)
+            kwargs: Keyword arguments
+        
+        Returns:
+            Task ID
+        """
+        name = self.task_name(fn)
+        _, pool = self._registry[name]
+        job_id = args[0] if args else (kwargs or {}).get("job_id", "")
+        payload = json.dumps({"args": list(args), "kwargs": kwargs or {}}, default=str)
+        now = time.time()
+        
+        with self._lock, self._connection() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO tasks (name, pool, job_id, payload, status, attempts, lease_expires, created_at)
+                VALUES (?, ?, ?, ?, 'queued', 0, 0, ?)
+                """,
+                (name, pool, job_id, payload, now)
+            )
+            return cursor.lastrowid
+    
+    def lease(self, owner: str, limit: int = 1, pools: Optional[list[str]] = None) -> list[LeasedTask]:
+        """Lease queued tasks, and tasks whose previous lease expired."""
+        now = time.time()
+        pools = pools or ["io", "cpu"]
+        placeholders = ", ".join("?" for _ in pools)
+        
+        with self._lock, self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                f"""
+                SELECT * FROM tasks
+                WHERE pool IN ({placeholders})
+                  AND (status = 'queued' OR (status = 'leased' AND lease_expires < ?))
+                  AND attempts < ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (*pools, now, settings.task_max_attempts, limit)
+            ).fetchall()
+            
+            for row in rows:
+                conn.execute(
+                    """
+                    UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1
+                    WHERE id = ?
+                    """,
+                    (owner, now + settings.task_lease_seconds, row["id"])
+                )
+        
+        tasks = []
+        for row in rows:
+            payload = json.loads(row["payload"])
+            tasks.append(LeasedTask(
+                task_id=row["id"],
+                name=row["name"],
+                pool=row["pool"],
+                job_id=row["job_id"],
+                args=payload["args"],
+                kwargs=payload["kwargs"],
+                attempts=row["attempts"] + 1
+            ))
+        return tasks
+    
+    def heartbeat(self, task_id: int, owner: str) -> bool:
+        """Extend a lease; False if the lease was lost to another worker."""
+        with self._lock, self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+                (time.time() + settings.task_lease_seconds, task_id, owner)
+            )
+            return cursor.rowcount == 1
+    
+    def complete(self, task_id: int, owner: str) -> None:
+        """Mark a leased task as done."""
+        self._finish(task_id, owner, "done")
+    
+    def fail(self, task_id: int, owner: str, error: str) -> None:
+        """Return a task that raised to the queue, or mark it dead after the last attempt."""
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                """
+                UPDATE tasks
+                SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'dead' END, error = ?, owner = NULL
+                WHERE id = ? AND owner = ?
+                """,
+                (settings.task_max_attempts, error, task_id, owner)
+            )
+    
+    def cancel(self, job_id: str) -> int:
+        """
+        Cancel the queued and running tasks of a job.
+        
+        Queued tasks are never leased; workers notice running ones through
+        cancelled() and stop them.
+        
+        Returns:
+            Number of tasks cancelled
+        """
+        with self._lock, self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'cancelled' WHERE job_id = ? AND status IN ('queued', 'leased')",
+                (job_id,)
+            )
+            return cursor.rowcount
+    
+    def cancelled(self, task_ids: list[int]) -> list[int]:
+        """IDs of the given tasks that were cancelled."""
+        if not task_ids:
+            return []
+        placeholders = ", ".join("?" for _ in task_ids)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT id FROM tasks WHERE status = 'cancelled' AND id IN ({placeholders})",
+                task_ids
+            ).fetchall()
+        return [row["id"] for row in rows]
+    
+    def reap_dead(self) -> list[str]:
+        """
+        Mark tasks that exhausted their attempts as dead.
+        
+        Returns:
+            Job IDs of the tasks reaped by this call
+        """
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """
+                SELECT id, job_id FROM tasks
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """,
+                (now, settings.task_max_attempts)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = 'dead', error = 'Lease expired' WHERE id = ?",
+                [(row["id"],) for row in rows]
+            )
+        return [row["job_id"] for row in rows]
+    
+    def purge(self, before: float) -> int:
+        """Delete finished tasks created before a timestamp."""
+        with self._lock, self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM tasks WHERE status IN ('done', 'dead', 'cancelled') AND created_at < ?",
+                (before,)
+            )
+            return cursor.rowcount
+    
+    def stats(self) -> dict[str, int]:
+        """Number of tasks per status."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) AS count FROM tasks GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["count"] for row in rows}
+    
+    def _finish(self, task_id: int, owner: str, status: str) -> None:
+        """Set the final status of a task still leased by owner."""
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, owner = NULL WHERE id = ? AND owner = ?",
+                (status, task_id, owner)
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use and create the schema."""
+        if self._conn is not None:
+            return self._conn
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; leases take an explicit write lock with BEGIN IMMEDIATE
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                pool TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                owner TEXT,
+                lease_expires REAL NOT NULL,
+                created_at REAL NOT NULL,
+                error TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks (status, id)")
+        self._conn = conn
+        return conn
+
+
+# Global task queue instance
+task_queue = TaskQueue()
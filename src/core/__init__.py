@@ -4,6 +4,11 @@ from .character import CharacterGenerator
 from .video import VideoGenerator
 from .audio import AudioGenerator
 from .composer import VideoComposer
+from .clients import ClientPool, PooledClient, client_pool
+from .poller import OperationPoller, operation_poller
+from .download import DownloadError, VideoDownloader, video_downloader
+from .ffmpeg import FFmpegCancelled, FFmpegRunner, FFmpegScheduler, FFmpegTimeout, current_job_id, ffmpeg_runner
+from .probe import MediaInfo, MediaProbe, media_probe
 
 __all__ = [
     "Config",
@@ -12,4 +17,21 @@ __all__ = [
     "VideoGenerator",
     "AudioGenerator",
     "VideoComposer",
+    "ClientPool",
+    "PooledClient",
+    "client_pool",
+    "OperationPoller",
+    "operation_poller",
+    "DownloadError",
+    "VideoDownloader",
+    "video_downloader",
+    "FFmpegCancelled",
+    "FFmpegRunner",
+    "FFmpegScheduler",
+    "FFmpegTimeout",
+    "current_job_id",
+    "ffmpeg_runner",
+    "MediaInfo",
+    "MediaProbe",
+    "media_probe",
 ]
@@ -1,24 +1,59 @@
 """Character reference image generation using Imagen 4.0."""
+import asyncio
 from pathlib import Path
 from typing import Optional
-from google import genai
 from google.genai import types
 
 from .config import settings
+from .clients import client_pool
 
 
 class CharacterGenerator:
     """Generates character reference images using Imagen 4.0."""
     
     def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or settings.gemini_api_key
-        self.client = genai.Client(api_key=self.api_key)
+        # Without an explicit key every request is routed through the client pool
+        self.api_key = api_key
         self.model = settings.imagen_model
     
     def generate_face(
         self,
         description: str,
         output_path: Optional[Path] = None
+    ) -> Optional[Path]:
+        """Generate face/headshot reference image (blocking wrapper)."""
+        return asyncio.run(self.generate_face_async(description, output_path))
+    
+    def generate_body(
+        self,
+        description: str,
+        reference_image_path: Optional[Path] = None,
+        output_path: Optional[Path] = None
+    ) -> Optional[Path]:
+        """Generate full body reference image (blocking wrapper)."""
+        return asyncio.run(
+            self.generate_body_async(description, reference_image_path, output_path)
+        )
+    
+    def generate_side(
+        self,
+        description: str,
+        reference_image_path: Optional[Path] = None,
+        output_path: Optional[Path] = None
+    ) -> Optional[Path]:
+        """Generate side profile reference image (blocking wrapper)."""
+        return asyncio.run(
+            self.generate_side_async(description, reference_image_path, output_path)
+        )
+    
+    def generate_all(self, description: str) -> dict[str, Optional[Path]]:
+        """Generate all three reference images (blocking wrapper)."""
+        return asyncio.run(self.generate_all_async(description))
+    
+    async def generate_face_async(
+        self,
+        description: str,
+        output_path: Optional[Path] = None
     ) -> Optional[Path]:
         """Generate face/headshot reference image."""
         output_path = output_path or settings.references_dir / "character_face.jpg"
@@ -32,9 +67,9 @@ class CharacterGenerator:
         High quality, 4K, photorealistic.
         """
         
-        return self._generate_image(prompt, output_path)
+        return await self._generate_image_async(prompt, output_path)
     
-    def generate_body(
+    async def generate_body_async(
         self,
         description: str,
         reference_image_path: Optional[Path] = None,
@@ -53,9 +88,11 @@ class CharacterGenerator:
         Same person, same facial features, same appearance.
         """
         
-        return self._generate_image_with_reference(prompt, reference_image_path, output_path)
+        return await self._generate_image_with_reference_async(
+            prompt, reference_image_path, output_path
+        )
     
-    def generate_side(
+    async def generate_side_async(
         self,
         description: str,
         reference_image_path: Optional[Path] = None,
@@ -73,28 +110,32 @@ class CharacterGenerator:
         Same person, same facial features, same appearance.
         """
         
-        return self._generate_image_with_reference(prompt, reference_image_path, output_path)
+        return await self._generate_image_with_reference_async(
+            prompt, reference_image_path, output_path
+        )
     
-    def generate_all(self, description: str) -> dict[str, Optional[Path]]:
-        """Generate all three reference images."""
-        return {
-            "face": self.generate_face(description),
-            "body": self.generate_body(description),
-            "side": self.generate_side(description),
-        }
+    async def generate_all_async(self, description: str) -> dict[str, Optional[Path]]:
+        """Generate all three reference images concurrently."""
+        face, body, side = await asyncio.gather(
+            self.generate_face_async(description),
+            self.generate_body_async(description),
+            self.generate_side_async(description),
+        )
+        return {"face": face, "body": body, "side": side}
     
-    def _generate_image(self, prompt: str, output_path: Path) -> Optional[Path]:
+    async def _generate_image_async(self, prompt: str, output_path: Path) -> Optional[Path]:
         """Generate image using Imagen 4.0 Fast."""
         try:
-            response = self.client.models.generate_images(
-                model=self.model,
-                prompt=prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=1,
-                    aspect_ratio=settings.default_aspect_ratio,
-                    person_generation="allow_adult"
+            with client_pool.lease(self.api_key) as pooled:
+                response = await pooled.client.aio.models.generate_images(
+                    model=self.model,
+                    prompt=prompt,
+                    config=types.GenerateImagesConfig(
+                        number_of_images=1,
+                        aspect_ratio=settings.default_aspect_ratio,
+                        person_generation="allow_adult"
+                    )
                 )
-            )
             
             if response.generated_images:
                 image_bytes = response.generated_images[0].image.image_bytes
@@ -103,12 +144,12 @@ class CharacterGenerator:
                 return output_path
             
             return None
-            
+        
         except Exception as e:
             print(f"Error generating image: {e}")
             return None
     
-    def _generate_image_with_reference(
+    async def _generate_image_with_reference_async(
         self, 
         prompt: str, 
         reference_image_path: Optional[Path],
@@ -118,4 +159,4 @@ class CharacterGenerator:
         # For now, Imagen 4.0 doesn't support reference images in the way we need
         # So we'll use the same generation method but with enhanced prompts
         # The prompts already include "same person" instructions
-        return self._generate_image(prompt, output_path)
+        return await self._generate_image_async(prompt, output_path)
@@ -0,0 +1,152 @@
+"""Pool of long-lived Gemini clients spread across API keys."""
+import hashlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from google import genai
+
+from .config import settings
+
+
+class PooledClient:
+    """A reusable client bound to one API key, with usage tracking."""
+    
+    def __init__(self, api_key: str, routable: bool = True):
+        self.api_key = api_key
+        self.key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+        self.routable = routable
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.cooldown_until = 0.0
+        self._consecutive_429 = 0
+        self._requests: deque = deque()
+        self._client: Optional[genai.Client] = None
+    
+    @property
+    def client(self) -> genai.Client:
+        """Client for this key, created on first use."""
+        if self._client is None:
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+    
+    def recent_requests(self, now: float) -> int:
+        """Requests started within the rate window."""
+        window_start = now - settings.key_rate_window
+        while self._requests and self._requests[0] < window_start:
+            self._requests.popleft()
+        return len(self._requests)
+    
+    def is_healthy(self, now: float) -> bool:
+        """Whether the key is outside a 429 cooldown."""
+        return self.cooldown_until <= now
+
+
+class ClientPool:
+    """
+    Hands out long-lived clients for the configured API keys.
+    
+    Each generation is routed to the healthy key with the fewest recent
+    requests; keys that answer 429 cool down with exponential backoff.
+    """
+    
+    def __init__(self, api_keys: Optional[list[str]] = None):
+        self._lock = threading.Lock()
+        self._clients: dict[str, PooledClient] = {}
+        for api_key in api_keys if api_keys is not None else settings.api_keys:
+            self._clients[api_key] = PooledClient(api_key)
+    
+    @contextmanager
+    def lease(self, api_key: Optional[str] = None) -> Iterator[PooledClient]:
+        """
+        Borrow a client for one upstream request.
+        
+        Args:
+            api_key: Use this key instead of routing to the least-loaded one
+        
+        Yields:
+            The pooled client; errors raised inside the block are recorded
+            against its key
+        """
+        with self._lock:
+            pooled = self.get(api_key) if api_key else self._pick()
+            pooled.in_flight += 1
+            pooled._requests.append(time.monotonic())
+        
+        try:
+            yield pooled
+        except Exception as e:
+            self._record_error(pooled, e)
+            raise
+        else:
+            pooled._consecutive_429 = 0
+        finally:
+            with self._lock:
+                pooled.in_flight -= 1
+    
+    def get(self, api_key: Optional[str] = None) -> PooledClient:
+        """Client for a specific key (the primary key by default)."""
+        api_key = api_key or settings.gemini_api_key or next(iter(self._clients), "")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        pooled = self._clients.get(api_key)
+        if pooled is None:
+            # Explicitly requested keys are reused but never routed to
+            pooled = self._clients[api_key] = PooledClient(api_key, routable=False)
+        return pooled
+    
+    def get_by_id(self, key_id: str) -> Optional[PooledClient]:
+        """Find a client by its key fingerprint."""
+        for pooled in self._clients.values():
+            if pooled.key_id == key_id:
+                return pooled
+        return None
+    
+    def stats(self) -> list[dict[str, Any]]:
+        """Per-key usage, identified by fingerprint only."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "key_id": pooled.key_id,
+                    "in_flight": pooled.in_flight,
+                    "recent_requests": pooled.recent_requests(now),
+                    "rate_limited": pooled.rate_limited,
+                    "errors": pooled.errors,
+                    "healthy": pooled.is_healthy(now),
+                }
+                for pooled in self._clients.values()
+                if pooled.routable
+            ]
+    
+    def _pick(self) -> PooledClient:
+        """Least-loaded healthy key, or the one leaving cooldown soonest."""
+        candidates = [pooled for pooled in self._clients.values() if pooled.routable]
+        if not candidates:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        now = time.monotonic()
+        healthy = [pooled for pooled in candidates if pooled.is_healthy(now)]
+        if not healthy:
+            return min(candidates, key=lambda pooled: pooled.cooldown_until)
+        
+        return min(healthy, key=lambda pooled: (pooled.recent_requests(now), pooled.in_flight))
+    
+    def _record_error(self, pooled: PooledClient, error: Exception) -> None:
+        """Count an error and start a cooldown if it was a rate limit."""
+        with self._lock:
+            pooled.errors += 1
+            if getattr(error, "code", None) != 429:
+                return
+            
+            pooled.rate_limited += 1
+            pooled._consecutive_429 += 1
+            backoff = settings.key_cooldown_seconds * 2 ** (pooled._consecutive_429 - 1)
+            pooled.cooldown_until = time.monotonic() + min(backoff, settings.key_max_cooldown_seconds)
+
+
+# Global client pool instance
+client_pool = ClientPool()
@@ -1,9 +1,107 @@
 """Video composition using FFmpeg."""
-import subprocess
+import contextvars
+import math
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from .config import settings
+from .ffmpeg import FFmpegCancelled, FFmpegTimeout, ffmpeg_runner
+from .probe import MediaInfo, media_probe
+
+
+# ASS colours (&HAABBGGRR&) for subtitle font colour names
+SUBTITLE_COLORS = {
+    "white": "&H00FFFFFF&",
+    "yellow": "&H0000FFFF&",
+    "red": "&H000000FF&",
+    "green": "&H0000FF00&",
+    "blue": "&H00FF0000&",
+    "black": "&H00000000&"
+}
+
+# Overlay coordinates of a watermark per corner
+WATERMARK_POSITIONS = {
+    "top-left": ("{m}", "{m}"),
+    "top-right": ("main_w-overlay_w-{m}", "{m}"),
+    "bottom-left": ("{m}", "main_h-overlay_h-{m}"),
+    "bottom-right": ("main_w-overlay_w-{m}", "main_h-overlay_h-{m}"),
+}
+
+
+@dataclass
+class Clip:
+    """A video segment of a composition."""
+    path: Path
+    start: float = 0.0
+    duration: Optional[float] = None  # None = until the end of the file
+
+
+@dataclass
+class AudioTrack:
+    """Voiceover or music laid over a composition."""
+    path: Path
+    volume: float = 1.0
+    delay: float = 0.0  # Seconds into the composition
+    loop: bool = False  # Repeat until the video ends (music beds)
+
+
+@dataclass
+class Subtitles:
+    """SRT file burned into the video."""
+    path: Path
+    font_size: int = 24
+    font_color: str = "white"
+
+
+@dataclass
+class Watermark:
+    """Image overlaid on a corner of the video."""
+    path: Path
+    position: str = "bottom-right"
+    width: float = 0.15  # Fraction of the video width
+    opacity: float = 1.0
+    margin: int = 24
+
+
+@dataclass
+class Composition:
+    """
+    Description of a complete edit, rendered with a single ffmpeg run.
+    
+    The output size defaults to the clips' own size when they all match
+    and to the configured video size otherwise.
+    """
+    clips: list[Clip]
+    audio: list[AudioTrack] = field(default_factory=list)
+    clip_audio: bool = False  # Keep the clips' own sound
+    transition: Optional[str] = None  # xfade transition between clips, e.g. "fade"
+    transition_duration: float = 0.5
+    subtitles: Optional[Subtitles] = None
+    watermark: Optional[Watermark] = None
+    size: Optional[tuple[int, int]] = None
+    fps: Optional[str] = None
+
+
+@dataclass
+class Rendition:
+    """Size and bitrate of a delivery format."""
+    width: int
+    height: int
+    video_kbps: int
+    audio_kbps: int = 128
+    fit: str = "crop"  # "crop" fills the frame, "pad" letterboxes
+
+
+# Delivery formats of finished videos, by name
+RENDITIONS = {
+    "high": Rendition(1080, 1920, 8000, 192),
+    "mobile": Rendition(720, 1280, 3000),
+    "square": Rendition(1080, 1080, 5000),
+}
 
 
 class VideoComposer:
@@ -13,7 +111,8 @@ class VideoComposer:
         self,
         video_path: Path,
         audio_path: Optional[Path] = None,
-        output_path: Optional[Path] = None
+        output_path: Optional[Path] = None,
+        on_progress: Optional[Callable[[float], None]] = None
     ) -> Optional[Path]:
         """
         Compose final video with optional audio.
@@ -22,6 +121,7 @@ class VideoComposer:
             video_path: Path to input video
             audio_path: Path to audio file (optional)
             output_path: Path to save final video
+            on_progress: Called with the completed fraction of the encode
             
         Returns:
             Path to final video or None
@@ -30,12 +130,12 @@ class VideoComposer:
             return None
         
         output_path = output_path or settings.output_dir / "final_video.mp4"
-        output_path.parent.mkdir(parents=True, exist_ok=True)
         
         if audio_path and audio_path.exists():
-            return self._add_audio(video_path, audio_path, output_path)
+            composition = Composition([Clip(video_path)], audio=[AudioTrack(audio_path)])
         else:
-            return self._copy_video(video_path, output_path)
+            composition = Composition([Clip(video_path)], clip_audio=True)
+        return self.render(composition, output_path, on_progress)
     
     def concatenate(
         self,
@@ -45,72 +145,616 @@ class VideoComposer:
         audio_path: Optional[Path] = None
     ) -> Optional[Path]:
         """Concatenate two videos with optional audio."""
+        return self.concatenate_many([video1, video2], output_path, audio_path)
+    
+    def concatenate_many(
+        self,
+        videos: list[Path],
+        output_path: Optional[Path] = None,
+        audio_path: Optional[Path] = None,
+        on_progress: Optional[Callable[[float], None]] = None
+    ) -> Optional[Path]:
+        """
+        Concatenate any number of videos in a single pass.
+        
+        Args:
+            videos: Input videos, in playback order
+            output_path: Path to save concatenated video
+            audio_path: Audio track to lay over the result (optional)
+            on_progress: Called with the completed fraction of the encode
+            
+        Returns:
+            Path to concatenated video or None
+        """
         output_path = output_path or settings.output_dir / "concatenated.mp4"
         
+        audio = [AudioTrack(audio_path)] if audio_path and audio_path.exists() else []
+        return self.render(Composition([Clip(video) for video in videos], audio=audio), output_path, on_progress)
+    
+    def render(
+        self,
+        composition: Composition,
+        output_path: Path,
+        on_progress: Optional[Callable[[float], None]] = None,
+        chunked: Optional[bool] = None
+    ) -> Optional[Path]:
+        """
+        Render a composition with exactly one ffmpeg run.
+        
+        The video is encoded once, or not at all: clips that share codec,
+        resolution and frame rate and need no filtering are stream-copied
+        (joined with the concat demuxer when there are several).
+        
+        Long single-clip encodes are split into keyframe-aligned chunks
+        encoded in parallel (see _render_chunked).
+        
+        Args:
+            composition: Edit to render
+            output_path: Path to save the video
+            on_progress: Called with the completed fraction of the encode
+            chunked: Force (True) or disable (False) chunked encoding;
+                by default outputs of chunked_encoding_min_duration or more
+        
+        Returns:
+            Path to the video or None
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        list_path = settings.temp_dir / f"{output_path.stem}_concat.txt"
+        
         try:
-            cmd = [
-                "ffmpeg",
-                "-i", str(video1),
-                "-i", str(video2),
-                "-filter_complex",
-                f"[0:v]scale={settings.video_width}:{settings.video_height}:force_original_aspect_ratio=decrease,"
-                f"pad={settings.video_width}:{settings.video_height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={settings.video_fps}[v0];"
-                f"[1:v]scale={settings.video_width}:{settings.video_height}:force_original_aspect_ratio=decrease,"
-                f"pad={settings.video_width}:{settings.video_height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={settings.video_fps}[v1];"
-                "[v0][v1]concat=n=2:v=1:a=0[vout]",
-                "-map", "[vout]",
-            ]
+            chunks = self._plan_chunks(composition, force=bool(chunked)) if chunked is not False else []
+            if chunks:
+                return self._render_chunked(composition, output_path, chunks, list_path, on_progress)
             
-            if audio_path and audio_path.exists():
-                cmd.extend(["-i", str(audio_path), "-map", "2:a"])
+            cmd, duration = self._compile(composition, output_path, list_path)
+            result = ffmpeg_runner.run(cmd, duration=duration, on_progress=on_progress)
+            if result.returncode != 0:
+                print(f"Error rendering {output_path.name}: {result.stderr[-2000:]}")
+                return None
+            return output_path
+        
+        except (FFmpegCancelled, FFmpegTimeout):
+            raise
+        except Exception as e:
+            print(f"Error rendering {output_path.name}: {e}")
+            return None
+        finally:
+            list_path.unlink(missing_ok=True)
+    
+    def render_renditions(
+        self,
+        video_path: Path,
+        outputs: dict[Path, Rendition],
+        on_progress: Optional[Callable[[float], None]] = None
+    ) -> bool:
+        """
+        Transcode a video to several renditions in one ffmpeg run.
+        
+        The source is decoded once and split into one scaled, bitrate-capped
+        encode per output.
+        
+        Args:
+            video_path: Source video
+            outputs: Rendition to write to each path
+            on_progress: Called with the completed fraction of the encode
+        
+        Returns:
+            True if every rendition was written
+        """
+        probe = media_probe.probe(video_path)
+        if not probe or not probe.video:
+            print(f"Error rendering renditions: {video_path} is not a video")
+            return False
+        
+        labels = [f"[r{i}]" for i in range(len(outputs))]
+        filters = [f"[0:v]split={len(outputs)}{''.join(labels)}"]
+        cmd = ["ffmpeg", "-i", str(video_path)]
+        for i, (output_path, rendition) in enumerate(outputs.items()):
+            width, height = rendition.width, rendition.height
+            if rendition.fit == "pad":
+                fit = f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+            else:
+                fit = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+            filters.append(f"{labels[i]}{fit},setsar=1,format=yuv420p[v{i}]")
             
+            output_path.parent.mkdir(parents=True, exist_ok=True)
             cmd.extend([
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "23",
-                "-c:a", "aac",
-                "-b:a", "192k",
-                "-y",
-                str(output_path)
+                "-map", f"[v{i}]",
+                "-c:v", "libx264", "-preset", "medium",
+                "-b:v", f"{rendition.video_kbps}k",
+                "-maxrate", f"{rendition.video_kbps}k",
+                "-bufsize", f"{rendition.video_kbps * 2}k"
             ])
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return output_path if result.returncode == 0 else None
-            
-        except Exception as e:
-            print(f"Error concatenating videos: {e}")
+            if probe.has_audio:
+                cmd.extend(["-map", "0:a:0", "-c:a", "aac", "-b:a", f"{rendition.audio_kbps}k"])
+            cmd.extend(["-movflags", "+faststart", "-y", str(output_path)])
+        cmd[3:3] = ["-filter_complex", ";".join(filters)]
+        
+        result = ffmpeg_runner.run(cmd, duration=probe.duration, on_progress=on_progress)
+        if result.returncode != 0:
+            print(f"Error rendering renditions of {video_path.name}: {result.stderr[-2000:]}")
+            return False
+        return True
+    
+    def package_hls(
+        self,
+        video_path: Path,
+        playlist_path: Path,
+        segment_seconds: float = 2.0
+    ) -> Optional[Path]:
+        """
+        Segment a video into an HLS VOD playlist next to the playlist path.
+        
+        H.264/AAC videos with keyframes at most two segments apart are
+        stream-copied, so segments are cut at the source's keyframes;
+        anything else is encoded with a keyframe at every segment boundary,
+        keeping the first segment (and so the first frame) small. Segments
+        are named `<playlist stem>_00000.ts` and the playlist only appears
+        once every segment is written.
+        
+        Args:
+            video_path: Finished video
+            playlist_path: Path of the .m3u8 playlist to write
+            segment_seconds: Target segment length
+        
+        Returns:
+            Path to the playlist or None
+        """
+        probe = media_probe.probe(video_path)
+        if not probe or not probe.video:
+            print(f"Error packaging HLS: {video_path} is not a video")
             return None
+        
+        keyframes = media_probe.keyframes(video_path) + [probe.duration or 0.0]
+        copy = (
+            probe.video.get("codec_name") == "h264"
+            and (not probe.has_audio or probe.audio.get("codec_name") == "aac")
+            and max((b - a for a, b in zip(keyframes, keyframes[1:])), default=float("inf")) <= 2 * segment_seconds
+        )
+        temp_path = playlist_path.with_name(f"{playlist_path.name}.part")
+        for segment in playlist_path.parent.glob(f"{playlist_path.stem}_*.ts"):
+            segment.unlink(missing_ok=True)
+        
+        cmd = ["ffmpeg", "-i", str(video_path), "-map", "0:v:0"]
+        if probe.has_audio:
+            cmd.extend(["-map", "0:a:0"])
+        if copy:
+            cmd.extend(["-c", "copy"])
+        else:
+            cmd.extend([
+                "-c:v", "libx264", "-preset", "medium", "-crf", "23",
+                "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+                "-c:a", "aac"
+            ])
+        cmd.extend([
+            "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", str(playlist_path.with_name(f"{playlist_path.stem}_%05d.ts")),
+            "-y", str(temp_path)
+        ])
+        
+        try:
+            result = ffmpeg_runner.run(cmd, duration=probe.duration)
+            if result.returncode != 0:
+                print(f"Error packaging {video_path.name} as HLS: {result.stderr[-2000:]}")
+                return None
+            temp_path.replace(playlist_path)
+            return playlist_path
+        finally:
+            temp_path.unlink(missing_ok=True)
+    
+    def render_previews(
+        self,
+        video_path: Path,
+        poster_path: Path,
+        preview_path: Path,
+        sheet_path: Path
+    ) -> bool:
+        """
+        Extract a poster, an animated preview and a contact sheet in one run.
+        
+        Only keyframes are decoded. The poster is the first keyframe, the
+        preview plays the keyframes at preview_fps as a small silent MP4 and
+        the contact sheet tiles up to preview_sheet_cells evenly spaced ones.
+        
+        Args:
+            video_path: Finished video
+            poster_path: JPEG poster to write
+            preview_path: MP4 preview to write
+            sheet_path: JPEG contact sheet to write
+        
+        Returns:
+            True if every file was written
+        """
+        probe = media_probe.probe(video_path)
+        if not probe or not probe.video:
+            print(f"Error rendering previews: {video_path} is not a video")
+            return False
+        
+        keyframes = len(media_probe.keyframes(video_path)) or 1
+        step = math.ceil(keyframes / settings.preview_sheet_cells)
+        cells = math.ceil(keyframes / step)
+        columns = min(cells, 4)
+        rows = math.ceil(cells / columns)
+        width = settings.preview_width
+        fps = settings.preview_fps
+        
+        filters = ";".join([
+            "[0:v]split=3[p][s][a]",
+            f"[p]scale={width * 2}:-2[poster]",
+            f"[s]select='not(mod(n\\,{step}))',scale={width}:-2,tile={columns}x{rows}[sheet]",
+            f"[a]scale={width}:-2,setpts=N/({fps}*TB),format=yuv420p[anim]",
+        ])
+        cmd = [
+            "ffmpeg", "-skip_frame", "nokey", "-i", str(video_path),
+            "-filter_complex", filters,
+            "-map", "[poster]", "-frames:v", "1", "-q:v", "3", "-y", str(poster_path),
+            "-map", "[sheet]", "-frames:v", "1", "-q:v", "3", "-y", str(sheet_path),
+            "-map", "[anim]", "-r", str(fps), "-c:v", "libx264", "-preset", "medium",
+            "-b:v", "150k", "-an", "-movflags", "+faststart", "-y", str(preview_path)
+        ]
+        
+        poster_path.parent.mkdir(parents=True, exist_ok=True)
+        result = ffmpeg_runner.run(cmd)
+        if result.returncode != 0:
+            print(f"Error rendering previews of {video_path.name}: {result.stderr[-2000:]}")
+            return False
+        return True
     
-    def _add_audio(self, video: Path, audio: Path, output: Path) -> Optional[Path]:
-        """Add audio to video."""
+    def _plan_chunks(self, composition: Composition, force: bool = False) -> list[tuple[float, float]]:
+        """
+        Time ranges to encode in parallel, cut at keyframes of the source.
+        
+        Only a single untrimmed clip that has to be re-encoded is chunked.
+        The chunk count follows the CPU count and the clip length, each
+        chunk lasting at least chunked_encoding_chunk_seconds.
+        
+        Returns:
+            (start, end) of every chunk, or an empty list to encode in one process
+        """
+        clips = composition.clips
+        if len(clips) != 1 or clips[0].start or clips[0].duration:
+            return []
+        if not (composition.subtitles or composition.watermark or composition.size or composition.fps):
+            return []  # Stream-copied, nothing to encode
+        
+        info = media_probe.probe(clips[0].path)
+        if not info or not info.video or not info.duration:
+            return []
+        if not force and info.duration < settings.chunked_encoding_min_duration:
+            return []
+        
+        cores = os.cpu_count() or 1
+        count = min(
+            settings.chunked_encoding_max_chunks or cores,
+            int(info.duration // settings.chunked_encoding_chunk_seconds)
+        )
+        if count < 2:
+            return []
+        
+        keyframes = media_probe.keyframes(clips[0].path)
+        cuts = sorted({
+            min(keyframes, key=lambda time: abs(time - info.duration * k / count))
+            for k in range(1, count)
+        } if keyframes else set())
+        bounds = [0.0, *(cut for cut in cuts if 0 < cut < info.duration), info.duration]
+        return list(zip(bounds, bounds[1:])) if len(bounds) > 2 else []
+    
+    def _render_chunked(
+        self,
+        composition: Composition,
+        output_path: Path,
+        chunks: list[tuple[float, float]],
+        list_path: Path,
+        on_progress: Optional[Callable[[float], None]] = None
+    ) -> Optional[Path]:
+        """
+        Encode chunks of the timeline concurrently, then join them losslessly.
+        
+        Every chunk is its own ffmpeg process (threads here only wait on
+        them); the ffmpeg scheduler bounds how many run at once and shares
+        the cores among them. The encoded chunks are joined with the concat
+        demuxer and the audio is mixed in the same pass. The first chunk
+        that fails stops the others.
+        """
+        clip = composition.clips[0]
+        chunk_paths = [settings.temp_dir / f"{output_path.stem}_chunk_{i}.mp4" for i in range(len(chunks))]
+        total = chunks[-1][1]
+        done = [0.0] * len(chunks)
+        abort = threading.Event()
+        
+        def encode(index: int, start: float, end: float) -> None:
+            part = replace(composition, clips=[Clip(clip.path, start, end - start)], audio=[], clip_audio=False)
+            cmd, duration = self._compile(part, chunk_paths[index], time_offset=start)
+            
+            def report(fraction: float) -> None:
+                done[index] = fraction * (end - start)
+                on_progress(min(sum(done) / total, 1.0))
+            
+            result = ffmpeg_runner.run(
+                cmd, duration=duration, on_progress=report if on_progress else None, abort=abort
+            )
+            if result.returncode != 0:
+                raise Exception(f"Chunk {index} failed: {result.stderr[-2000:]}")
+        
         try:
-            cmd = [
-                "ffmpeg",
-                "-i", str(video),
-                "-i", str(audio),
-                "-c:v", "copy",
-                "-c:a", "aac",
-                "-map", "0:v:0",
-                "-map", "1:a:0",
-                "-shortest",
-                "-y",
-                str(output)
-            ]
+            with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="chunk") as pool:
+                # Each chunk keeps the job context so cancellation reaches its process
+                futures = [
+                    pool.submit(contextvars.copy_context().run, encode, index, start, end)
+                    for index, (start, end) in enumerate(chunks)
+                ]
+                finished, pending = wait(futures, return_when=FIRST_EXCEPTION)
+                failed = [future for future in finished if future.exception()]
+                if failed:
+                    abort.set()
+                    for future in pending:
+                        future.cancel()
+                    # Raise the failure itself, not a sibling's abort
+                    raise failed[0].exception()
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return output if result.returncode == 0 else None
+            audio = list(composition.audio)
+            probe = media_probe.probe(clip.path)
+            if composition.clip_audio and probe and probe.has_audio:
+                audio.insert(0, AudioTrack(clip.path))
+            joined = Composition([Clip(path) for path in chunk_paths], audio=audio)
             
-        except Exception as e:
-            print(f"Error adding audio: {e}")
-            return None
+            cmd, _ = self._compile(joined, output_path, list_path)
+            result = ffmpeg_runner.run(cmd)
+            if result.returncode != 0:
+                print(f"Error joining chunks of {output_path.name}: {result.stderr[-2000:]}")
+                return None
+            return output_path
+        finally:
+            for path in chunk_paths:
+                path.unlink(missing_ok=True)
     
-    def _copy_video(self, input_path: Path, output: Path) -> Optional[Path]:
-        """Copy video to output location."""
-        try:
-            cmd = ["ffmpeg", "-i", str(input_path), "-c", "copy", "-y", str(output)]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return output if result.returncode == 0 else None
+    def build_command(
+        self,
+        composition: Composition,
+        output_path: Path,
+        list_path: Optional[Path] = None
+    ) -> list[str]:
+        """
+        Compile a composition into one ffmpeg command line.
+        
+        Args:
+            composition: Edit to compile
+            output_path: Output video
+            list_path: Where to write the concat list if clips are stream-copied
+        
+        Returns:
+            ffmpeg arguments
+        """
+        return self._compile(composition, output_path, list_path)[0]
+    
+    def _compile(
+        self,
+        composition: Composition,
+        output_path: Path,
+        list_path: Optional[Path] = None,
+        time_offset: float = 0.0
+    ) -> tuple[list[str], Optional[float]]:
+        """
+        Command line and expected output duration (None if unknown) of a composition.
+        
+        time_offset is the position of the first frame in the full timeline,
+        so subtitles of a chunk line up.
+        """
+        clips = composition.clips
+        if not clips:
+            raise ValueError("A composition needs at least one clip")
+        
+        probes = [media_probe.probe(clip.path) for clip in clips]
+        durations = [
+            clip.duration or (probe.duration - clip.start if probe and probe.duration else None)
+            for clip, probe in zip(clips, probes)
+        ]
+        
+        signatures = {self._signature(probe) for probe in probes}
+        uniform = len(signatures) == 1 and None not in signatures
+        transition = composition.transition if len(clips) > 1 else None
+        
+        copy_video = uniform and not (
+            transition
+            or composition.subtitles
+            or composition.watermark
+            or composition.size
+            or composition.fps
+            or any(clip.start or clip.duration for clip in clips)
+        )
+        
+        if transition and None in durations:
+            raise ValueError("Transitions need the duration of every clip")
+        total = None
+        if None not in durations:
+            total = sum(durations) - (composition.transition_duration * (len(clips) - 1) if transition else 0)
+        
+        # Inputs: the clips (or one concat list of them), audio tracks, watermark
+        cmd = ["ffmpeg"]
+        if copy_video and len(clips) > 1:
+            list_path = list_path or output_path.with_suffix(".concat.txt")
+            list_path.parent.mkdir(parents=True, exist_ok=True)
+            list_path.write_text("".join(
+                "file '{}'\n".format(str(clip.path.resolve()).replace("'", "'\\''"))
+                for clip in clips
+            ))
+            cmd.extend(["-f", "concat", "-safe", "0", "-i", str(list_path)])
+            clip_inputs = [0]
+        else:
+            for clip in clips:
+                if clip.start:
+                    cmd.extend(["-ss", str(clip.start)])
+                if clip.duration:
+                    cmd.extend(["-t", str(clip.duration)])
+                cmd.extend(["-i", str(clip.path)])
+            clip_inputs = list(range(len(clips)))
+        
+        next_input = len(clip_inputs)
+        track_inputs = []
+        for track in composition.audio:
+            if track.loop:
+                cmd.extend(["-stream_loop", "-1"])
+            cmd.extend(["-i", str(track.path)])
+            track_inputs.append(next_input)
+            next_input += 1
+        
+        if composition.watermark:
+            cmd.extend(["-i", str(composition.watermark.path)])
+        
+        filters: list[str] = []
+        maps: list[str] = []
+        codecs: list[str] = []
+        
+        # Video: copied, or filtered and encoded once
+        if copy_video:
+            maps.extend(["-map", "0:v:0"])
+            codecs.extend(["-c:v", "copy"])
+        else:
+            video = self._video_filters(composition, probes, durations, uniform, next_input, time_offset, filters)
+            maps.extend(["-map", video])
+            codecs.extend(["-c:v", "libx264", "-preset", "medium", "-crf", "23"])
+        
+        # Audio: clip sound and tracks, mixed
+        keep_clip_audio = composition.clip_audio and all(probe and probe.has_audio for probe in probes)
+        if keep_clip_audio and not composition.audio and len(clip_inputs) == 1 and not clips[0].start:
+            # The clips' sound needs no processing
+            maps.extend(["-map", "0:a:0"])
+            codecs.extend(["-c:a", "copy"])
+        else:
+            sources = []
+            if keep_clip_audio:
+                sources.append(self._clip_audio_filters(composition, clip_inputs, filters))
+            for index, (track, input_index) in enumerate(zip(composition.audio, track_inputs)):
+                filters.append(
+                    f"[{input_index}:a]volume={track.volume},"
+                    f"adelay={int(track.delay * 1000)}:all=1[a{index}]"
+                )
+                sources.append(f"[a{index}]")
             
-        except Exception as e:
-            print(f"Error copying video: {e}")
+            if len(sources) > 1:
+                filters.append(f"{''.join(sources)}amix=inputs={len(sources)}:duration=longest:normalize=0[mixed]")
+                sources = ["[mixed]"]
+            if sources:
+                maps.extend(["-map", sources[0]])
+                codecs.extend(["-c:a", "aac", "-b:a", "192k"])
+        
+        if filters:
+            cmd.extend(["-filter_complex", ";".join(filters)])
+        cmd.extend(maps)
+        cmd.extend(codecs)
+        
+        # Audio tracks may outlast the video, which sets the length
+        if total is not None:
+            cmd.extend(["-t", f"{total:.3f}"])
+        elif composition.audio:
+            cmd.append("-shortest")
+        
+        cmd.extend(["-movflags", "+faststart", "-y", str(output_path)])
+        return cmd, total
+    
+    def _video_filters(
+        self,
+        composition: Composition,
+        probes: list[Optional[MediaInfo]],
+        durations: list[Optional[float]],
+        uniform: bool,
+        watermark_input: int,
+        time_offset: float,
+        filters: list[str]
+    ) -> str:
+        """Append the video part of the filter graph; returns its output label."""
+        if composition.size:
+            width, height = composition.size
+        elif uniform:
+            width, height = probes[0].width, probes[0].height
+        else:
+            width, height = settings.video_width, settings.video_height
+        fps = composition.fps or (probes[0].fps if uniform else settings.video_fps)
+        
+        # Normalize every clip to the output geometry so they can be joined
+        count = len(composition.clips)
+        for i in range(count):
+            filters.append(
+                f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p[v{i}]"
+            )
+        
+        if count == 1:
+            current = "[v0]"
+        elif composition.transition:
+            fade = composition.transition_duration
+            current, length = "[v0]", durations[0]
+            for i in range(1, count):
+                filters.append(
+                    f"{current}[v{i}]xfade=transition={composition.transition}:"
+                    f"duration={fade}:offset={length - fade:.3f}[x{i}]"
+                )
+                current, length = f"[x{i}]", length + durations[i] - fade
+        else:
+            labels = "".join(f"[v{i}]" for i in range(count))
+            filters.append(f"{labels}concat=n={count}:v=1:a=0[joined]")
+            current = "[joined]"
+        
+        if composition.subtitles:
+            subtitles = composition.subtitles
+            color = SUBTITLE_COLORS.get(subtitles.font_color.lower(), SUBTITLE_COLORS["white"])
+            # Escape the subtitle path for Windows
+            path = str(subtitles.path).replace("\\", "\\\\").replace(":", "\\:")
+            shift, unshift = "", ""
+            if time_offset:
+                # Shifting timestamps drops the frame rate; restore it for the join
+                shift, unshift = f"setpts=PTS+{time_offset}/TB,", f",setpts=PTS-STARTPTS,fps={fps}"
+            filters.append(
+                f"{current}{shift}subtitles={path}:force_style="
+                f"'FontSize={subtitles.font_size},PrimaryColour={color},Alignment=2'{unshift}[subbed]"
+            )
+            current = "[subbed]"
+        
+        if composition.watermark:
+            watermark = composition.watermark
+            x, y = WATERMARK_POSITIONS.get(watermark.position, WATERMARK_POSITIONS["bottom-right"])
+            filters.append(
+                f"[{watermark_input}:v]scale={int(width * watermark.width)}:-1,format=rgba,"
+                f"colorchannelmixer=aa={watermark.opacity}[logo]"
+            )
+            filters.append(
+                f"{current}[logo]overlay={x.format(m=watermark.margin)}:{y.format(m=watermark.margin)}[marked]"
+            )
+            current = "[marked]"
+        
+        return current
+    
+    def _clip_audio_filters(
+        self,
+        composition: Composition,
+        clip_inputs: list[int],
+        filters: list[str]
+    ) -> str:
+        """Append the joined sound of the clips to the filter graph; returns its label."""
+        for i, input_index in enumerate(clip_inputs):
+            filters.append(f"[{input_index}:a]aresample=48000,asetpts=PTS-STARTPTS[ca{i}]")
+        
+        count = len(clip_inputs)
+        if count == 1:
+            return "[ca0]"
+        if composition.transition:
+            current = "[ca0]"
+            for i in range(1, count):
+                filters.append(f"{current}[ca{i}]acrossfade=d={composition.transition_duration}[cx{i}]")
+                current = f"[cx{i}]"
+            return current
+        
+        labels = "".join(f"[ca{i}]" for i in range(count))
+        filters.append(f"{labels}concat=n={count}:v=0:a=1[clipaudio]")
+        return "[clipaudio]"
+    
+    @staticmethod
+    def _signature(probe: Optional[MediaInfo]) -> Optional[tuple]:
+        """Stream properties that must match for clips to be joined without re-encoding."""
+        if not probe or not probe.video:
             return None
+        return tuple(probe.video.get(key) for key in (
+            "codec_name", "profile", "level", "width", "height", "pix_fmt", "r_frame_rate", "time_base"
+        ))
@@ -13,6 +13,7 @@ class Config(BaseSettings):
     
     # API Keys
     gemini_api_key: str = ""
+    gemini_api_keys: str = ""  # Comma-separated extra keys for the client pool
     airtable_api_key: str = ""
     airtable_base_id: str = ""
     airtable_table_name: str = "AI_Influencer_Videos"
@@ -32,6 +33,102 @@ class Config(BaseSettings):
     video_width: int = 1080
     video_height: int = 1920
     video_fps: int = 30
+    longform_max_scenes: int = 12
+    longform_max_parallel_segments: int = 4
+    
+    # Client Pool
+    key_rate_window: float = 60.0
+    key_cooldown_seconds: float = 5.0
+    key_max_cooldown_seconds: float = 120.0
+    
+    # Operation Polling
+    poller_baseline_interval: float = 5.0
+    poller_early_window: float = 8.0
+    poller_early_interval: float = 4.0
+    poller_near_interval: float = 2.0
+    poller_max_interval: float = 20.0
+    poller_expected_seconds: float = 60.0
+    
+    # Downloads
+    download_chunk_size: int = 1024 * 1024
+    download_max_retries: int = 3
+    download_pool_size: int = 20
+    download_timeout: float = 60.0
+    
+    # Generation Cache
+    cache_max_bytes: int = 5 * 1024 ** 3
+    cache_max_age: float = 7 * 24 * 3600
+    idempotency_ttl: float = 24 * 3600
+    
+    # Admission Control
+    veo_requests_per_minute: float = 10.0
+    imagen_requests_per_minute: float = 60.0
+    admission_burst: int = 5
+    admission_queue_size: int = 100
+    
+    # Worker Pools
+    io_workers: int = 100
+    cpu_workers: int = 0  # 0 = derive from CPU count
+    
+    # Job Store
+    job_store: str = "memory"  # "memory" or "sqlite"
+    job_store_path: Path = data_dir / "jobs.db"
+    job_flush_interval: float = 2.0
+    job_ttl: float = 7 * 24 * 3600
+    job_wait_max: float = 60.0
+    job_events_keepalive: float = 15.0
+    cancel_grace_seconds: float = 5.0  # Wait for a cancelled task to unwind
+    
+    # Execution
+    execution_mode: str = "inline"  # "inline" or "queue" (tasks run by `python -m src.worker`)
+    task_queue_path: Path = data_dir / "tasks.db"
+    task_lease_seconds: float = 60.0
+    task_heartbeat_interval: float = 15.0
+    task_max_attempts: int = 3
+    worker_concurrency: int = 8
+    worker_poll_interval: float = 1.0
+    
+    # Retention
+    retention_max_bytes: int = 20 * 1024 ** 3
+    retention_interval: float = 60.0
+    retention_sweep_batch: int = 500
+    retention_ttls: dict[str, float] = {
+        "video": 7 * 24 * 3600,
+        "stream": 7 * 24 * 3600,
+        "image": 7 * 24 * 3600,
+        "voiceover": 7 * 24 * 3600,
+        "upload": 24 * 3600,
+        "subtitle": 24 * 3600,
+        "segment": 24 * 3600,
+        "partial": 6 * 3600,
+        "temp": 24 * 3600,
+        "other": 7 * 24 * 3600,
+    }
+    
+    # FFmpeg
+    ffmpeg_timeout: float = 1800.0  # Wall-clock limit per process
+    ffmpeg_stall_timeout: float = 120.0  # Limit without encoding progress
+    ffmpeg_stderr_lines: int = 200  # Log tail kept for error messages
+    ffmpeg_max_encodes: int = 0  # Concurrent encodes; 0 = half the CPU count
+    
+    # HLS packaging of finished videos (streaming preview)
+    hls_enabled: bool = False
+    hls_segment_seconds: float = 2.0
+    hls_workers: int = 1
+    
+    # Previews (poster, animated preview and contact sheet of finished videos)
+    preview_width: int = 320
+    preview_fps: float = 2.0  # Keyframes shown per second in the animated preview
+    preview_sheet_cells: int = 12
+    
+    # Chunked encoding (parallel encodes of long single-clip renders)
+    chunked_encoding_min_duration: float = 60.0
+    chunked_encoding_chunk_seconds: float = 10.0  # Minimum chunk length
+    chunked_encoding_max_chunks: int = 0  # 0 = CPU count
+    
+    # Media Probe
+    probe_index_path: Path = data_dir / "probe_index.json"
+    probe_index_max_entries: int = 10000
     
     # API Settings
     api_host: str = "0.0.0.0"
@@ -49,10 +146,16 @@ class Config(BaseSettings):
     
     def validate_api_key(self) -> bool:
         """Validate that Gemini API key is configured."""
-        if not self.gemini_api_key:
+        if not self.api_keys:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         return True
     
+    @property
+    def api_keys(self) -> list[str]:
+        """All configured Gemini API keys, primary key first."""
+        keys = [self.gemini_api_key] + self.gemini_api_keys.split(",")
+        return list(dict.fromkeys(key.strip() for key in keys if key.strip()))
+    
     @property
     def airtable_enabled(self) -> bool:
         """Check if Airtable integration is configured."""
@@ -0,0 +1,181 @@
+"""Streaming, resumable downloads of generated media."""
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import settings
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed."""
+
+
+class _Interrupted(Exception):
+    """The server closed the stream before sending every byte."""
+
+
+# Errors after which the transfer is resumed with an HTTP Range request
+RESUMABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+    _Interrupted,
+)
+
+
+class VideoDownloader:
+    """Downloads remote files in chunks through a pooled keep-alive session."""
+    
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        pool_size: Optional[int] = None
+    ):
+        self.chunk_size = chunk_size or settings.download_chunk_size
+        self.max_retries = max_retries if max_retries is not None else settings.download_max_retries
+        pool_size = pool_size or settings.download_pool_size
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self.completed = 0
+        self.resumed = 0
+        self.bytes_downloaded = 0
+    
+    def download(
+        self,
+        uri: str,
+        output_path: Path,
+        headers: Optional[dict[str, str]] = None
+    ) -> Path:
+        """
+        Stream a remote file to disk.
+        
+        The body is written chunk by chunk to a temp file, resumed with a
+        Range request if the connection drops, checked against the size
+        announced by the server and finally renamed onto output_path.
+        
+        Args:
+            uri: File URI
+            output_path: Final location of the file
+            headers: Extra request headers (e.g. API key)
+        
+        Returns:
+            output_path
+        """
+        temp_path = settings.temp_dir / f"{output_path.name}.{uuid.uuid4().hex}.part"
+        temp_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            received, expected = self._stream(uri, temp_path, headers or {})
+            
+            if expected is not None and received != expected:
+                raise DownloadError(f"Size mismatch: got {received} bytes, expected {expected}")
+            
+            self._commit(temp_path, output_path)
+            self.completed += 1
+            return output_path
+        
+        finally:
+            temp_path.unlink(missing_ok=True)
+    
+    def stats(self) -> dict[str, Any]:
+        """Download statistics."""
+        return {
+            "completed": self.completed,
+            "resumed": self.resumed,
+            "bytes_downloaded": self.bytes_downloaded,
+            "chunk_size": self.chunk_size,
+        }
+    
+    def _stream(
+        self,
+        uri: str,
+        temp_path: Path,
+        headers: dict[str, str]
+    ) -> tuple[int, Optional[int]]:
+        """Write the response body to temp_path, resuming after interruptions."""
+        received = 0
+        expected = None
+        attempts = 0
+        
+        with open(temp_path, "wb") as fh:
+            while True:
+                request_headers = {**headers, "Accept-Encoding": "identity"}
+                if received:
+                    request_headers["Range"] = f"bytes={received}-"
+                
+                try:
+                    with self.session.get(
+                        uri,
+                        headers=request_headers,
+                        stream=True,
+                        timeout=(10, settings.download_timeout)
+                    ) as response:
+                        if received and response.status_code == 200:
+                            # Server ignored the Range header: start over
+                            fh.seek(0)
+                            fh.truncate()
+                            received = 0
+                        elif response.status_code not in (200, 206):
+                            raise DownloadError(f"Download failed: HTTP {response.status_code}")
+                        
+                        if expected is None:
+                            expected = self._total_size(response)
+                        
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            fh.write(chunk)
+                            received += len(chunk)
+                            self.bytes_downloaded += len(chunk)
+                    
+                    if expected is not None and received < expected:
+                        raise _Interrupted(f"Stream ended at {received}/{expected} bytes")
+                    
+                    return received, expected
+                
+                except RESUMABLE_ERRORS as e:
+                    attempts += 1
+                    if attempts > self.max_retries:
+                        raise DownloadError(f"Download failed after {attempts} attempts: {e}") from e
+                    
+                    self.resumed += 1
+                    time.sleep(min(2 ** attempts, 10))
+    
+    @staticmethod
+    def _total_size(response: requests.Response) -> Optional[int]:
+        """Full size of the remote file, if the server announced it."""
+        content_range = response.headers.get("Content-Range")
+        if response.status_code == 206 and content_range and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            return int(total) if total.isdigit() else None
+        
+        content_length = response.headers.get("Content-Length")
+        return int(content_length) if content_length and content_length.isdigit() else None
+    
+    @staticmethod
+    def _commit(temp_path: Path, output_path: Path) -> None:
+        """Atomically move a finished download into place."""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            os.replace(temp_path, output_path)
+        except OSError:
+            # temp_dir on another filesystem: stage next to the target first
+            staged = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}")
+            try:
+                shutil.copyfile(temp_path, staged)
+                os.replace(staged, output_path)
+            finally:
+                staged.unlink(missing_ok=True)
+
+
+# Global downloader instance
+video_downloader = VideoDownloader()
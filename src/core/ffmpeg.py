@@ -0,0 +1,377 @@
+"""FFmpeg process runner with progress reporting, timeouts and per-job cancellation."""
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import IO, Any, Callable, Optional
+
+from .config import settings
+
+
+# Job on whose behalf the current task runs; set by the job executor and
+# inherited by worker threads, so encodes can be attributed without
+# threading a job ID through every call.
+current_job_id: ContextVar[Optional[str]] = ContextVar("current_job_id", default=None)
+
+
+class FFmpegCancelled(Exception):
+    """Raised when the job owning an ffmpeg process was cancelled."""
+
+
+class FFmpegTimeout(Exception):
+    """Raised when an ffmpeg process ran too long or stopped making progress."""
+
+
+class FFmpegScheduler:
+    """
+    Limits how many encodes run at once and shares the cores among them.
+    
+    Encodes beyond max_encodes wait in FIFO order. Each encode that starts
+    gets -threads for its share of the cores given how many encodes are
+    running or waiting, so a burst of jobs does not oversubscribe the CPU.
+    Stream-copy remuxes are cheap and bypass the queue.
+    """
+    
+    def __init__(self, max_encodes: Optional[int] = None, cores: Optional[int] = None):
+        self.cores = cores or os.cpu_count() or 1
+        self.max_encodes = max_encodes or settings.ffmpeg_max_encodes or max(1, self.cores // 2)
+        self._condition = threading.Condition()
+        self._queue: deque[object] = deque()
+        self._running = 0
+        
+        self.encodes = 0
+        self.remuxes = 0
+        self.wait_seconds = 0.0
+        self.encode_seconds = 0.0
+    
+    @staticmethod
+    def is_remux(cmd: list[str]) -> bool:
+        """Whether a command only copies the video stream (no decode or encode)."""
+        codecs = [cmd[i + 1] for i, arg in enumerate(cmd[:-1]) if arg in ("-c", "-c:v", "-vcodec")]
+        return bool(codecs) and all(codec == "copy" for codec in codecs)
+    
+    @staticmethod
+    def with_threads(cmd: list[str], threads: int) -> list[str]:
+        """
+        Set the encoder threads of every output of a command.
+        
+        -threads is an output option, so it goes before each output path;
+        outputs are written as `-y <path>`, or the command ends with the path.
+        """
+        outputs = {i + 1 for i, arg in enumerate(cmd[:-1]) if arg == "-y"} or {len(cmd) - 1}
+        result = []
+        for i, arg in enumerate(cmd):
+            if i in outputs:
+                result.extend(["-threads", str(threads)])
+            result.append(arg)
+        return result
+    
+    def acquire(self, cancelled: Callable[[], bool]) -> int:
+        """
+        Wait for an encode slot.
+        
+        Args:
+            cancelled: Polled while waiting; stops waiting once it returns True
+        
+        Returns:
+            Encoder threads for the encode, or 0 if it was cancelled while queued
+        """
+        ticket = object()
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while self._queue[0] is not ticket or self._running >= self.max_encodes:
+                    if cancelled():
+                        return 0
+                    self._condition.wait(timeout=0.5)
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+            
+            self._running += 1
+            # Share the cores among the encodes running or about to run
+            active = min(self.max_encodes, self._running + len(self._queue))
+            return max(1, self.cores // active)
+    
+    def bypass(self) -> None:
+        """Count a remux that started without a slot."""
+        with self._condition:
+            self.remuxes += 1
+    
+    def release(self, wait_seconds: float, encode_seconds: float) -> None:
+        """Free the slot of a finished encode."""
+        with self._condition:
+            self._running -= 1
+            self.encodes += 1
+            self.wait_seconds += wait_seconds
+            self.encode_seconds += encode_seconds
+            self._condition.notify_all()
+    
+    def wake(self) -> None:
+        """Let queued encodes re-check whether they were cancelled."""
+        with self._condition:
+            self._condition.notify_all()
+    
+    def stats(self) -> dict[str, Any]:
+        """Slot usage and average queue wait versus encode time."""
+        with self._condition:
+            return {
+                "cores": self.cores,
+                "max_encodes": self.max_encodes,
+                "running": self._running,
+                "queued": len(self._queue),
+                "encodes": self.encodes,
+                "remuxes": self.remuxes,
+                "avg_wait_seconds": round(self.wait_seconds / self.encodes, 2) if self.encodes else None,
+                "avg_encode_seconds": round(self.encode_seconds / self.encodes, 2) if self.encodes else None,
+            }
+
+
+class _Run:
+    """Progress of one ffmpeg process, updated by its reader threads."""
+    
+    def __init__(self, duration: Optional[float], on_progress: Optional[Callable[[float], None]]):
+        self.duration = duration
+        self.on_progress = on_progress
+        self.started = time.monotonic()
+        self.last_progress = self.started
+        self.out_time = 0.0
+        self.queued = 0.0  # Seconds spent waiting for an encode slot
+        self.stderr: deque[str] = deque(maxlen=settings.ffmpeg_stderr_lines)
+    
+    def read_progress(self, stream: IO[str]) -> None:
+        """Parse `-progress` key=value blocks as ffmpeg writes them."""
+        for line in stream:
+            key, _, value = line.strip().partition("=")
+            if key == "out_time_us" and value.isdigit():
+                out_time = int(value) / 1_000_000
+                if out_time > self.out_time:
+                    self.out_time = out_time
+                    self.last_progress = time.monotonic()
+            elif key == "progress" and self.on_progress and self.duration:
+                # One block per key=value batch; report once per block
+                try:
+                    self.on_progress(min(self.out_time / self.duration, 1.0))
+                except Exception as e:
+                    print(f"Progress callback failed: {e}")
+    
+    def read_stderr(self, stream: IO[str]) -> None:
+        """Keep only the last lines of the log for error messages."""
+        for line in stream:
+            self.stderr.append(line)
+
+
+class FFmpegRunner:
+    """
+    Runs ffmpeg processes.
+    
+    Every process reports progress through `-progress pipe:1`, which is
+    mapped to a 0-1 fraction of the expected output duration. Processes
+    are killed after ffmpeg_timeout seconds, or when the encoded time has
+    not advanced for ffmpeg_stall_timeout seconds; only a bounded tail of
+    stderr is kept. Processes of cancelled jobs are terminated.
+    
+    Encodes go through the scheduler, which bounds how many run at once
+    and sets their -threads; stream-copy remuxes start immediately.
+    """
+    
+    # Cancelled job IDs are remembered (bounded) so a worker thread that is
+    # still finishing cannot start a new encode for the job afterwards
+    MAX_CANCELLED = 10000
+    HISTORY = 100
+    
+    def __init__(self, kill_timeout: float = 5.0, scheduler: Optional[FFmpegScheduler] = None):
+        self.kill_timeout = kill_timeout
+        self.scheduler = scheduler or FFmpegScheduler()
+        self._processes: dict[str, set[subprocess.Popen]] = {}
+        self._cancelled: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.runs = 0
+        self.failed = 0
+        self.timeouts = 0
+        self._history: deque[dict[str, Any]] = deque(maxlen=self.HISTORY)
+    
+    def run(
+        self,
+        cmd: list[str],
+        job_id: Optional[str] = None,
+        duration: Optional[float] = None,
+        on_progress: Optional[Callable[[float], None]] = None,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        abort: Optional[threading.Event] = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run an ffmpeg command to completion.
+        
+        Encodes first wait for a scheduler slot; time limits apply from
+        the moment the process starts.
+        
+        Args:
+            cmd: Full command line
+            job_id: Owning job (default: the job of the current task)
+            duration: Expected output duration in seconds, for progress
+            on_progress: Called with the completed fraction (0-1)
+            timeout: Wall-clock limit (default: ffmpeg_timeout)
+            stall_timeout: Limit without progress (default: ffmpeg_stall_timeout)
+            abort: Kills the process once set, e.g. when a sibling run failed
+        
+        Returns:
+            Completed process; stderr holds the tail of the log
+        
+        Raises:
+            FFmpegCancelled: If the owning job was cancelled or abort was set
+            FFmpegTimeout: If a time limit was exceeded
+        """
+        job_id = job_id or current_job_id.get()
+        timeout = timeout or settings.ffmpeg_timeout
+        stall_timeout = stall_timeout or settings.ffmpeg_stall_timeout
+        cmd = [cmd[0], "-hide_banner", "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        
+        queued = time.monotonic()
+        encode = not self.scheduler.is_remux(cmd)
+        if encode:
+            threads = self.scheduler.acquire(
+                lambda: job_id in self._cancelled or (abort is not None and abort.is_set())
+            )
+            if not threads:
+                raise FFmpegCancelled(f"Job {job_id} was cancelled")
+            if "-threads" not in cmd:
+                cmd = self.scheduler.with_threads(cmd, threads)
+        else:
+            self.scheduler.bypass()
+        state = _Run(duration, on_progress)
+        state.queued = state.started - queued
+        
+        try:
+            with self._lock:
+                if job_id in self._cancelled:
+                    raise FFmpegCancelled(f"Job {job_id} was cancelled")
+                process = subprocess.Popen(
+                    cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+                )
+                if job_id:
+                    self._processes.setdefault(job_id, set()).add(process)
+        except BaseException:
+            if encode:
+                self.scheduler.release(state.queued, 0.0)
+            raise
+        
+        readers = [
+            threading.Thread(target=state.read_progress, args=(process.stdout,), daemon=True),
+            threading.Thread(target=state.read_stderr, args=(process.stderr,), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        
+        timed_out = None
+        aborted = False
+        try:
+            while True:
+                try:
+                    process.wait(timeout=0.5)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                
+                now = time.monotonic()
+                if now - state.started > timeout:
+                    timed_out = f"ran longer than {timeout:g}s"
+                elif now - state.last_progress > stall_timeout:
+                    timed_out = f"made no progress for {stall_timeout:g}s"
+                if abort is not None and abort.is_set():
+                    aborted = True
+                if timed_out or aborted:
+                    process.kill()
+                    process.wait()
+                    break
+        finally:
+            for reader in readers:
+                reader.join(timeout=self.kill_timeout)
+            with self._lock:
+                processes = self._processes.get(job_id)
+                if processes is not None:
+                    processes.discard(process)
+                    if not processes:
+                        del self._processes[job_id]
+                cancelled = job_id in self._cancelled
+            if encode:
+                self.scheduler.release(state.queued, time.monotonic() - state.started)
+        
+        self._record(job_id, state, process.returncode, timed_out)
+        
+        if cancelled:
+            raise FFmpegCancelled(f"Job {job_id} was cancelled")
+        if aborted:
+            raise FFmpegCancelled("ffmpeg run was aborted")
+        if timed_out:
+            raise FFmpegTimeout(f"ffmpeg {timed_out}: {''.join(state.stderr)[-500:]}")
+        return subprocess.CompletedProcess(cmd, process.returncode, "", "".join(state.stderr))
+    
+    def cancel(self, job_id: str) -> int:
+        """
+        Terminate the running processes of a job and refuse new ones.
+        
+        Returns:
+            Number of processes terminated
+        """
+        with self._lock:
+            self._cancelled[job_id] = None
+            while len(self._cancelled) > self.MAX_CANCELLED:
+                self._cancelled.popitem(last=False)
+            processes = list(self._processes.get(job_id, ()))
+        self.scheduler.wake()
+        
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=self.kill_timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        return len(processes)
+    
+    def running(self) -> int:
+        """Number of ffmpeg processes currently running."""
+        with self._lock:
+            return sum(len(processes) for processes in self._processes.values())
+    
+    def stats(self) -> dict[str, Any]:
+        """Run counters and encode speed of recent runs."""
+        with self._lock:
+            history = list(self._history)
+            speeds = [run["speed"] for run in history if run["speed"]]
+            return {
+                "running": sum(len(processes) for processes in self._processes.values()),
+                "runs": self.runs,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "avg_speed": round(sum(speeds) / len(speeds), 2) if speeds else None,
+                "scheduler": self.scheduler.stats(),
+                "recent": history[-10:],
+            }
+    
+    def _record(self, job_id: Optional[str], state: _Run, returncode: int, timed_out: Optional[str]) -> None:
+        """Keep the outcome and speed (x realtime) of a finished run."""
+        elapsed = time.monotonic() - state.started
+        with self._lock:
+            self.runs += 1
+            if returncode != 0:
+                self.failed += 1
+            if timed_out:
+                self.timeouts += 1
+            self._history.append({
+                "job_id": job_id,
+                "queued_seconds": round(state.queued, 2),
+                "seconds": round(elapsed, 2),
+                "media_seconds": round(state.out_time, 2),
+                "speed": round(state.out_time / elapsed, 2) if elapsed > 0 and state.out_time else None,
+                "returncode": returncode,
+            })
+
+
+# Global ffmpeg runner instance
+ffmpeg_runner = FFmpegRunner()
@@ -0,0 +1,245 @@
+"""Shared poller for long-running Veo operations."""
+import asyncio
+import itertools
+import math
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from .config import settings
+
+
+@dataclass
+class PendingOperation:
+    """An operation owned by the poller until it completes."""
+    operation: Any
+    client: Any
+    model: str
+    future: asyncio.Future
+    started_at: float
+    deadline: float
+    next_check: float
+    last_check: float
+    checks: int = 0
+    on_poll: Optional[Callable[[int], None]] = None
+
+
+class OperationPoller:
+    """
+    Polls every pending operation from a single loop.
+    
+    Intervals adapt to the age of each operation: quick checks right after
+    submission, long sleeps through the bulk of the generation and tight
+    checks around the completion time learned from previous operations of
+    the same model.
+    """
+    
+    def __init__(self, history_size: int = 50):
+        self._pending: dict[int, PendingOperation] = {}
+        self._history: dict[str, deque] = {}
+        self._lags: deque = deque(maxlen=history_size)
+        self._history_size = history_size
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        self.status_calls = 0
+        self.completed = 0
+        self.timed_out = 0
+        self._finished_calls = 0
+        self._baseline_calls = 0
+    
+    async def wait(
+        self,
+        operation: Any,
+        client: Any,
+        model: str,
+        timeout: float = 120,
+        on_poll: Optional[Callable[[int], None]] = None
+    ) -> Any:
+        """
+        Wait until an operation is done.
+        
+        Args:
+            operation: Pending operation returned by generate_videos
+            client: genai client that created the operation
+            model: Model name, used to learn expected durations
+            timeout: Max wait time in seconds
+            on_poll: Called with elapsed seconds after every status check
+        
+        Returns:
+            The completed operation
+        """
+        if operation.done:
+            return operation
+        
+        loop = asyncio.get_running_loop()
+        self._ensure_running(loop)
+        
+        now = loop.time()
+        entry = PendingOperation(
+            operation=operation,
+            client=client,
+            model=model,
+            future=loop.create_future(),
+            started_at=now,
+            deadline=now + timeout,
+            next_check=now + self._next_interval(model, 0, timeout),
+            last_check=now,
+            on_poll=on_poll
+        )
+        entry_id = next(self._ids)
+        self._pending[entry_id] = entry
+        self._wakeup.set()
+        
+        try:
+            return await entry.future
+        finally:
+            self._pending.pop(entry_id, None)
+    
+    def expected_duration(self, model: str) -> float:
+        """Median observed generation time for a model."""
+        history = self._history.get(model)
+        if not history:
+            return settings.poller_expected_seconds
+        return statistics.median(history)
+    
+    def stats(self) -> dict[str, Any]:
+        """Polling statistics."""
+        return {
+            "pending": len(self._pending),
+            "status_calls": self.status_calls,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "calls_saved": self._baseline_calls - self._finished_calls,
+            "median_ready_lag_seconds": (
+                round(statistics.median(self._lags), 2) if self._lags else None
+            ),
+            "expected_duration_seconds": {
+                model: round(self.expected_duration(model), 1)
+                for model in self._history
+            },
+        }
+    
+    def _ensure_running(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start the polling loop on the current event loop if needed."""
+        if self._task and not self._task.done() and self._loop is loop:
+            return
+        
+        # Operations registered on a previous (closed) loop can never resume;
+        # those of a crashed task on this loop are picked up by the new one
+        self._pending = {
+            entry_id: entry for entry_id, entry in self._pending.items()
+            if not entry.future.get_loop().is_closed()
+        }
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+    
+    async def _run(self) -> None:
+        """Poll due operations, then sleep until the next one is due."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            self._wakeup.clear()
+            
+            now = loop.time()
+            due = [e for e in self._pending.values() if e.next_check <= now]
+            if due:
+                await asyncio.gather(*(self._check_safely(entry) for entry in due))
+            
+            if self._pending:
+                next_due = min(e.next_check for e in self._pending.values())
+                delay = max(0.0, next_due - loop.time())
+            else:
+                delay = None
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _check_safely(self, entry: PendingOperation) -> None:
+        """Check one operation; an error (e.g. in on_poll) fails only its waiter."""
+        try:
+            await self._check(entry)
+        except Exception as e:
+            if not entry.future.done():
+                entry.future.set_exception(e)
+    
+    async def _check(self, entry: PendingOperation) -> None:
+        """Fetch the status of one operation and resolve or reschedule it."""
+        if entry.future.done():
+            return
+        
+        loop = asyncio.get_running_loop()
+        
+        try:
+            operation = await entry.client.aio.operations.get(entry.operation)
+        except Exception as e:
+            if not entry.future.done():
+                entry.future.set_exception(e)
+            return
+        
+        now = loop.time()
+        elapsed = now - entry.started_at
+        entry.operation = operation
+        entry.checks += 1
+        self.status_calls += 1
+        
+        if entry.on_poll:
+            entry.on_poll(int(elapsed))
+        
+        if entry.future.done():
+            return
+        
+        if operation.done:
+            # The operation became ready somewhere since the previous check
+            lag = (now - entry.last_check) / 2
+            ready_after = elapsed - lag
+            self._lags.append(lag)
+            history = self._history.setdefault(entry.model, deque(maxlen=self._history_size))
+            history.append(ready_after)
+            self._finish(entry, ready_after)
+            self.completed += 1
+            entry.future.set_result(operation)
+        elif now >= entry.deadline:
+            self._finish(entry, elapsed)
+            self.timed_out += 1
+            entry.future.set_exception(TimeoutError("Video generation timeout"))
+        else:
+            entry.last_check = now
+            interval = self._next_interval(entry.model, elapsed, entry.deadline - now)
+            entry.next_check = now + interval
+    
+    def _finish(self, entry: PendingOperation, ready_after: float) -> None:
+        """Account calls against a fixed-interval loop for the same operation."""
+        baseline_interval = settings.poller_baseline_interval
+        self._baseline_calls += max(1, math.ceil(ready_after / baseline_interval))
+        self._finished_calls += entry.checks
+    
+    def _next_interval(self, model: str, elapsed: float, remaining: float) -> float:
+        """Seconds until the next status check for an operation of this age."""
+        expected = self.expected_duration(model)
+        early = settings.poller_early_interval
+        near = settings.poller_near_interval
+        longest = settings.poller_max_interval
+        
+        if elapsed < settings.poller_early_window:
+            interval = early
+        elif elapsed < expected * 0.85:
+            # Sleep through the bulk of the generation, waking before the window
+            interval = min(longest, max(early, expected * 0.85 - elapsed))
+        elif elapsed < expected * 1.25:
+            interval = near
+        else:
+            # Slower than usual: back off gradually
+            interval = min(longest, max(near, (elapsed - expected) / 4))
+        
+        return max(0.0, min(interval, remaining))
+
+
+# Global poller instance
+operation_poller = OperationPoller()
@@ -0,0 +1,224 @@
+"""Cached media metadata from ffprobe."""
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from .config import settings
+
+
+@dataclass
+class MediaInfo:
+    """Container and stream metadata of a media file."""
+    path: str
+    size: int
+    mtime_ns: int
+    duration: Optional[float] = None
+    format_name: Optional[str] = None
+    streams: list[dict[str, Any]] = field(default_factory=list)
+    keyframes: Optional[list[float]] = None  # Video keyframe times, probed on demand
+    
+    @property
+    def video(self) -> Optional[dict[str, Any]]:
+        """First video stream."""
+        return next((s for s in self.streams if s.get("codec_type") == "video"), None)
+    
+    @property
+    def audio(self) -> Optional[dict[str, Any]]:
+        """First audio stream."""
+        return next((s for s in self.streams if s.get("codec_type") == "audio"), None)
+    
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+    
+    @property
+    def width(self) -> Optional[int]:
+        return self.video.get("width") if self.video else None
+    
+    @property
+    def height(self) -> Optional[int]:
+        return self.video.get("height") if self.video else None
+    
+    @property
+    def fps(self) -> Optional[str]:
+        """Frame rate as a fraction, e.g. "24/1"."""
+        return self.video.get("r_frame_rate") if self.video else None
+
+
+class MediaProbe:
+    """
+    ffprobe results cached in a persistent index.
+    
+    Entries are keyed by path and validated against the file's size and
+    modification time, so an asset is probed once until it is rewritten.
+    The index keeps the most recently used max_entries files.
+    """
+    
+    STREAM_ENTRIES = (
+        "codec_type,codec_name,profile,level,width,height,pix_fmt,"
+        "r_frame_rate,time_base,sample_rate,channels,duration"
+    )
+    
+    def __init__(self, index_path: Optional[Path] = None, max_entries: Optional[int] = None):
+        self.index_path = index_path or settings.probe_index_path
+        self.max_entries = max_entries or settings.probe_index_max_entries
+        self._entries: OrderedDict[str, MediaInfo] = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        
+        self._load()
+    
+    def probe(self, path: Path) -> Optional[MediaInfo]:
+        """
+        Metadata of a media file.
+        
+        Returns:
+            Cached or freshly probed metadata, or None if the file is missing
+            or not readable media
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        
+        key = str(path.resolve())
+        with self._lock:
+            info = self._entries.get(key)
+            if info and info.size == stat.st_size and info.mtime_ns == stat.st_mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return info
+        
+        info = self._run_ffprobe(path, key, stat)
+        if info is None:
+            return None
+        
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+        return info
+    
+    def duration(self, path: Path) -> Optional[float]:
+        """Duration in seconds of a media file, or None if unknown."""
+        info = self.probe(path)
+        return info.duration if info else None
+    
+    def keyframes(self, path: Path) -> list[float]:
+        """Times in seconds of the video keyframes of a file (decodes keyframes only)."""
+        info = self.probe(path)
+        if info is None:
+            return []
+        if info.keyframes is not None:
+            return info.keyframes
+        
+        cmd = [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-skip_frame", "nokey",
+            "-show_entries", "frame=pts_time",
+            "-of", "csv=p=0",
+            str(path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error probing keyframes of {path}: {e}")
+            return []
+        if result.returncode != 0:
+            return []
+        
+        keyframes = sorted(
+            float(line.strip().rstrip(","))
+            for line in result.stdout.splitlines()
+            if line.strip().rstrip(",").replace(".", "", 1).isdigit()
+        )
+        with self._lock:
+            info.keyframes = keyframes
+            self._save()
+        return keyframes
+    
+    def forget(self, *paths: Path) -> None:
+        """Drop the entries of deleted files."""
+        with self._lock:
+            removed = [self._entries.pop(str(path.resolve()), None) for path in paths]
+            if any(removed):
+                self._save()
+    
+    def stats(self) -> dict[str, Any]:
+        """Index size and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+    
+    def _run_ffprobe(self, path: Path, key: str, stat: os.stat_result) -> Optional[MediaInfo]:
+        """Probe a file with ffprobe."""
+        cmd = [
+            "ffprobe", "-v", "error",
+            "-show_entries", f"stream={self.STREAM_ENTRIES}:format=duration,format_name",
+            "-of", "json",
+            str(path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if result.returncode != 0:
+                return None
+            data = json.loads(result.stdout or "{}")
+        except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+            print(f"Error probing {path}: {e}")
+            return None
+        
+        container = data.get("format", {})
+        duration = container.get("duration")
+        return MediaInfo(
+            path=key,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            duration=float(duration) if duration else None,
+            format_name=container.get("format_name"),
+            streams=data.get("streams", [])
+        )
+    
+    def _load(self) -> None:
+        """Load the persisted index."""
+        if not self.index_path.exists():
+            return
+        
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            for entry in data.get("entries", []):
+                self._entries[entry["path"]] = MediaInfo(**entry)
+        except Exception as e:
+            print(f"Ignoring unreadable probe index: {e}")
+    
+    def _save(self) -> None:
+        """Persist the index atomically."""
+        data = {"entries": [asdict(info) for info in self._entries.values()]}
+        
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            # Per-process temp file: API and workers share the index
+            temp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            temp_path.replace(self.index_path)
+        except Exception as e:
+            print(f"Failed to save probe index: {e}")
+
+
+# Global media probe instance
+media_probe = MediaProbe()
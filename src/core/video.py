@@ -1,21 +1,23 @@
 """Video generation using Veo3 API."""
-import time
+import asyncio
 from pathlib import Path
-from typing import Optional
-import requests
-from google import genai
+from typing import Callable, Optional
 from google.genai import types
 
 from .config import settings
+from .clients import PooledClient, client_pool
+from .download import video_downloader
+from .poller import operation_poller
 
 
 class VideoGenerator:
     """Generates videos using Veo3 API."""
     
     def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or settings.gemini_api_key
-        self.client = genai.Client(api_key=self.api_key)
+        # Without an explicit key every request is routed through the client pool
+        self.api_key = api_key
         self.model = settings.veo_model
+        self._operation_clients: dict[str, PooledClient] = {}
     
     def generate(
         self,
@@ -25,6 +27,27 @@ class VideoGenerator:
         aspect_ratio: str = None,
         duration_seconds: int = None,
         timeout: int = 120
+    ) -> Optional[Path]:
+        """Generate video using Veo3 (blocking wrapper around generate_async)."""
+        return asyncio.run(
+            self.generate_async(
+                prompt,
+                image_path=image_path,
+                output_path=output_path,
+                aspect_ratio=aspect_ratio,
+                duration_seconds=duration_seconds,
+                timeout=timeout
+            )
+        )
+    
+    async def generate_async(
+        self,
+        prompt: str,
+        image_path: Optional[Path] = None,
+        output_path: Optional[Path] = None,
+        aspect_ratio: str = None,
+        duration_seconds: int = None,
+        timeout: int = 120
     ) -> Optional[Path]:
         """
         Generate video using Veo3.
@@ -36,25 +59,47 @@ class VideoGenerator:
             aspect_ratio: Video aspect ratio
             duration_seconds: Video duration
             timeout: Max wait time in seconds
-            
+        
         Returns:
             Path to generated video or None
         """
         output_path = output_path or settings.output_dir / "generated_video.mp4"
+        
+        try:
+            operation = await self.start_async(
+                prompt,
+                image_path=image_path,
+                aspect_ratio=aspect_ratio,
+                duration_seconds=duration_seconds
+            )
+            operation = await self.wait_async(operation, timeout=timeout)
+            return await self.download_async(operation, output_path)
+        
+        except Exception as e:
+            print(f"Error generating video: {e}")
+            return None
+    
+    async def start_async(
+        self,
+        prompt: str,
+        image_path: Optional[Path] = None,
+        aspect_ratio: str = None,
+        duration_seconds: int = None
+    ) -> types.GenerateVideosOperation:
+        """Submit a Veo3 generation request and return the pending operation."""
         aspect_ratio = aspect_ratio or settings.default_aspect_ratio
         duration_seconds = duration_seconds or settings.default_duration
         
-        try:
-            # Prepare image input
-            image_input = None
-            if image_path and image_path.exists():
-                image_input = types.Image(
-                    image_bytes=image_path.read_bytes(),
-                    mime_type="image/jpeg"
-                )
-            
-            # Generate video
-            operation = self.client.models.generate_videos(
+        # Prepare image input
+        image_input = None
+        if image_path and image_path.exists():
+            image_input = types.Image(
+                image_bytes=image_path.read_bytes(),
+                mime_type="image/jpeg"
+            )
+        
+        with client_pool.lease(self.api_key) as pooled:
+            operation = await pooled.client.aio.models.generate_videos(
                 model=self.model,
                 prompt=prompt,
                 image=image_input,
@@ -63,32 +108,80 @@ class VideoGenerator:
                     duration_seconds=duration_seconds,
                 ),
             )
-            
-            # Poll for completion
-            elapsed = 0
-            while not operation.done and elapsed < timeout:
-                time.sleep(5)
-                elapsed += 5
-                operation = self.client.operations.get(operation)
-            
-            if not operation.done:
-                return None
-            
-            # Download video
-            for video in operation.response.generated_videos:
-                return self._download_video(video.video.uri, output_path)
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error generating video: {e}")
-            return None
+        
+        # Polling and download must use the key that created the operation
+        self._operation_clients[operation.name] = pooled
+        return operation
+    
+    async def wait_async(
+        self,
+        operation: types.GenerateVideosOperation,
+        timeout: int = 120,
+        on_poll: Optional[Callable[[int], None]] = None
+    ) -> types.GenerateVideosOperation:
+        """
+        Wait for an operation through the shared operation poller.
+        
+        Args:
+            operation: Operation returned by start_async
+            timeout: Max wait time in seconds
+            on_poll: Called with elapsed seconds after every status check
+        
+        Returns:
+            The completed operation
+        """
+        return await operation_poller.wait(
+            operation,
+            self.client_for(operation).client,
+            self.model,
+            timeout=timeout,
+            on_poll=on_poll
+        )
+    
+    async def download_async(
+        self,
+        operation: types.GenerateVideosOperation,
+        output_path: Path
+    ) -> Path:
+        """Download the first video of a completed operation."""
+        if operation.response and operation.response.generated_videos:
+            video = operation.response.generated_videos[0]
+            api_key = self.client_for(operation).api_key
+            return await asyncio.to_thread(self._fetch_video, video.video.uri, output_path, api_key)
+        
+        raise Exception("Operation finished without generated videos")
+    
+    def attach(self, operation_name: str, key_id: str) -> types.GenerateVideosOperation:
+        """Re-attach to an operation started by an earlier process."""
+        pooled = client_pool.get_by_id(key_id)
+        if pooled is None:
+            raise Exception("The API key that started this operation is no longer configured")
+        
+        self._operation_clients[operation_name] = pooled
+        return types.GenerateVideosOperation(name=operation_name)
+    
+    def client_for(self, operation: types.GenerateVideosOperation) -> PooledClient:
+        """Pooled client whose key created the operation."""
+        return self._operation_clients.get(operation.name) or client_pool.get(self.api_key)
     
     def generate_influencer_video(
         self,
         character_face_path: Path,
         product_description: str,
         output_path: Optional[Path] = None
+    ) -> Optional[Path]:
+        """Generate influencer video showing product (blocking wrapper)."""
+        return asyncio.run(
+            self.generate_influencer_video_async(
+                character_face_path, product_description, output_path
+            )
+        )
+    
+    async def generate_influencer_video_async(
+        self,
+        character_face_path: Path,
+        product_description: str,
+        output_path: Optional[Path] = None
     ) -> Optional[Path]:
         """Generate influencer video showing product."""
         prompt = f"""
@@ -102,25 +195,33 @@ class VideoGenerator:
         4K quality, engaging and authentic.
         """
         
-        return self.generate(
+        return await self.generate_async(
             prompt=prompt,
             image_path=character_face_path,
             output_path=output_path
         )
     
-    def _download_video(self, uri: str, output_path: Path) -> Optional[Path]:
+    def _download_video(
+        self,
+        uri: str,
+        output_path: Path,
+        api_key: Optional[str] = None
+    ) -> Optional[Path]:
         """Download video from URI."""
         try:
-            headers = {"x-goog-api-key": self.api_key}
-            response = requests.get(uri, headers=headers)
-            
-            if response.status_code == 200:
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                output_path.write_bytes(response.content)
-                return output_path
-            
-            return None
-            
+            return self._fetch_video(uri, output_path, api_key)
+        
         except Exception as e:
             print(f"Error downloading video: {e}")
             return None
+    
+    def _fetch_video(
+        self,
+        uri: str,
+        output_path: Path,
+        api_key: Optional[str] = None
+    ) -> Path:
+        """Stream video from URI to disk, raising on errors."""
+        api_key = api_key or client_pool.get(self.api_key).api_key
+        headers = {"x-goog-api-key": api_key}
+        return video_downloader.download(uri, output_path, headers=headers)
@@ -0,0 +1,115 @@
+"""
+Worker process that runs job tasks from the durable task queue.
+
+Start the API with EXECUTION_MODE=queue and JOB_STORE=sqlite, then run
+one or more workers on the same host:
+    
+    python -m src.worker
+"""
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from functools import partial
+from typing import Optional
+
+from src.core.config import settings
+from src.core.ffmpeg import current_job_id, ffmpeg_runner
+from src.api.cache import generation_cache
+from src.api.jobs import job_executor, job_manager
+from src.api.retention import retention_manager
+from src.api.task_queue import LeasedTask, task_queue
+from src.api.routes.video import _cleanup_cancelled_job
+import src.api.routes  # noqa: F401  (registers the job tasks)
+
+
+class Worker:
+    """Leases tasks from the queue and runs them on the local worker pools."""
+    
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or settings.worker_concurrency
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._running: dict[int, asyncio.Task] = {}
+        self._stopping = False
+    
+    async def run(self) -> None:
+        """Lease and run tasks until stopped, then let running tasks finish."""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+        
+        print(f"Worker {self.owner} started ({self.concurrency} concurrent tasks)")
+        
+        while not self._stopping:
+            for job_id in await asyncio.to_thread(task_queue.reap_dead):
+                job_manager.fail(job_id, f"Task abandoned after {settings.task_max_attempts} attempts")
+            
+            for task_id in await asyncio.to_thread(task_queue.cancelled, list(self._running)):
+                self._running[task_id].cancel()
+            
+            free = self.concurrency - len(self._running)
+            tasks = await asyncio.to_thread(task_queue.lease, self.owner, free) if free > 0 else []
+            for task in tasks:
+                running = asyncio.ensure_future(self._execute(task))
+                self._running[task.task_id] = running
+                running.add_done_callback(partial(self._forget, task.task_id))
+            
+            if not tasks:
+                await asyncio.sleep(settings.worker_poll_interval)
+        
+        print(f"Worker {self.owner} stopping, waiting for {len(self._running)} task(s)")
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+        job_manager.flush()
+    
+    def stop(self) -> None:
+        """Stop leasing new tasks."""
+        self._stopping = True
+    
+    async def _execute(self, task: LeasedTask) -> None:
+        """Run one task while keeping its lease alive."""
+        fn, pool = task_queue.resolve(task.name)
+        current_job_id.set(task.job_id)
+        heartbeat = asyncio.ensure_future(self._heartbeat(task))
+        
+        try:
+            await job_executor.pools[pool].run(partial(fn, *task.args, **task.kwargs))
+        except asyncio.CancelledError:
+            # Cancelled through the API. Drop the cached job and mark it again,
+            # as an update made here before noticing may have overwritten it.
+            print(f"Task {task.task_id} ({task.name}) cancelled")
+            job_manager.detach(task.job_id)
+            job_manager.cancel(task.job_id)
+            await asyncio.to_thread(ffmpeg_runner.cancel, task.job_id)
+            await asyncio.to_thread(_cleanup_cancelled_job, task.job_id)
+        except Exception as e:
+            print(f"Task {task.task_id} ({task.name}) failed on attempt {task.attempts}: {e}")
+            await asyncio.to_thread(task_queue.fail, task.task_id, self.owner, str(e))
+        else:
+            await asyncio.to_thread(task_queue.complete, task.task_id, self.owner)
+        finally:
+            heartbeat.cancel()
+    
+    def _forget(self, task_id: int, _: asyncio.Task) -> None:
+        """Free the slot of a finished task."""
+        self._running.pop(task_id, None)
+    
+    async def _heartbeat(self, task: LeasedTask) -> None:
+        """Extend the lease of a running task."""
+        while True:
+            await asyncio.sleep(settings.task_heartbeat_interval)
+            if not await asyncio.to_thread(task_queue.heartbeat, task.task_id, self.owner):
+                print(f"Lost the lease of task {task.task_id}")
+                return
+
+
+if __name__ == "__main__":
+    if settings.job_store != "sqlite":
+        raise SystemExit("Workers share job state through the SQLite job store: set JOB_STORE=sqlite")
+    
+    settings.setup_directories()
+    # The cache and retention indexes belong to the API process
+    generation_cache.persist = False
+    retention_manager.persist = False
+    asyncio.run(Worker().run())
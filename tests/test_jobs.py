@@ -0,0 +1,30 @@
+"""Tests for job state management."""
+import asyncio
+import time
+
+from src.api.job_store import InMemoryJobStore
+from src.api.jobs import JobManager
+
+
+def test_wait_for_change_returns_finished_job_immediately():
+    manager = JobManager(InMemoryJobStore())
+    manager.create("done")
+    manager.complete("done", "/api/v1/download/done_final.mp4")
+    
+    started = time.monotonic()
+    job = asyncio.run(manager.wait_for_change("done", timeout=3.0))
+    
+    assert job.status == "completed"
+    assert time.monotonic() - started < 0.5
+
+
+def test_late_update_does_not_cache_cancelled_job():
+    manager = JobManager(InMemoryJobStore())
+    manager.create("cancelled")
+    manager.update("cancelled", status="processing")
+    manager.cancel("cancelled")
+    
+    job = manager.fail("cancelled", "Task stopped")
+    
+    assert job.status == "cancelled"
+    assert manager.stats()["active"] == 0